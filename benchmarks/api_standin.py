@@ -0,0 +1,318 @@
+"""Local stand-in for NextDNS API used by the benchmarks."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+API_ENDPOINT = "https://api.nextdns.io"
+TEST_DOMAIN = ".test.nextdns.io"
+
+ANALYTICS = {
+    "status": ("status", ["default", "blocked", "allowed", "relayed"]),
+    "dnssec": ("validated", [True, False]),
+    "encryption": ("encrypted", [True, False]),
+    "ipVersions": ("version", [4, 6]),
+    "protocols": (
+        "protocol",
+        ["DNS-over-HTTPS", "DNS-over-QUIC", "DNS-over-TLS", "TCP", "UDP"],
+    ),
+}
+
+TOP_LISTS = {
+    "domains": ("domain", [f"domain{index}.example" for index in range(20)]),
+    "reasons": ("name", ["NextDNS Ads & Trackers Blocklist", "Native Tracking"]),
+}
+
+
+@dataclass
+class StandInConfig:
+    """Behaviour of the stand-in API."""
+
+    # Response latency in seconds and its random jitter
+    latency: float = 0.02
+    jitter: float = 0.0
+    # Share of requests answered with HTTP 500
+    error_rate: float = 0.0
+    # Requests per second accepted before answering with HTTP 429
+    rate_limit: float | None = None
+    retry_after: int = 1
+    seed: int = 0
+
+
+@dataclass
+class Profile:
+    """Profile served by the stand-in API."""
+
+    id: str
+    name: str
+    fingerprint: str
+    queries: Counter[str] = field(default_factory=Counter)
+    settings: dict[str, Any] = field(default_factory=dict)
+
+
+class NextDnsStandIn:
+    """Class to serve a subset of NextDNS API from a local aiohttp server."""
+
+    def __init__(self, profiles: int, config: StandInConfig | None = None) -> None:
+        """Initialize."""
+        self.config = config or StandInConfig()
+        self.random = random.Random(self.config.seed)
+        self.profiles = {
+            f"prof{index:04d}": Profile(
+                f"prof{index:04d}", f"Profile {index}", f"fp{index:04d}"
+            )
+            for index in range(profiles)
+        }
+        for profile in self.profiles.values():
+            profile.settings = _default_settings()
+        self.requests: Counter[str] = Counter()
+        self.rate_limited = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def rewrite(self, url: str) -> str:
+        """Return the stand-in URL for a NextDNS URL."""
+        if url.startswith(API_ENDPOINT):
+            return self.base_url + url[len(API_ENDPOINT) :]
+        host = url.split("://", 1)[-1].split("/", 1)[0]
+        if host.endswith(TEST_DOMAIN):
+            return f"{self.base_url}/test/{host[: -len(TEST_DOMAIN)]}"
+        return url
+
+    def requests_for(self, prefix: str) -> int:
+        """Return the number of requests whose route starts with the prefix."""
+        return sum(
+            count for route, count in self.requests.items() if route.startswith(prefix)
+        )
+
+    async def start(self) -> None:
+        """Start serving on a random local port."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/profiles", self._profiles)
+        app.router.add_get("/profiles/{profile}", self._profile)
+        app.router.add_get("/profiles/{profile}/analytics/{type}", self._analytics)
+        app.router.add_patch("/profiles/{profile}/{path:.*}", self._patch)
+        app.router.add_delete("/profiles/{profile}/logs", self._clear_logs)
+        app.router.add_get("/test/{profile}", self._test)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def add_queries(self, count: int) -> None:
+        """Add random DNS queries to the analytics of every profile."""
+        for profile in self.profiles.values():
+            for _ in range(count):
+                for api_type, (_, values) in ANALYTICS.items():
+                    profile.queries[f"{api_type}:{self.random.choice(values)}"] += 1
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.Response:
+        """Count requests and apply latency, errors and rate limiting."""
+        route = request.match_info.route.resource
+        name = route.canonical if route is not None else request.path
+        self.requests[f"{request.method} {name}"] += 1
+
+        delay = self.config.latency + self.random.uniform(0, self.config.jitter)
+        await asyncio.sleep(delay)
+
+        if self.config.rate_limit is not None:
+            now = asyncio.get_running_loop().time()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.config.rate_limit:
+                self.rate_limited += 1
+                return web.json_response(
+                    {"errors": [{"code": "tooManyRequests"}]},
+                    status=429,
+                    headers={"Retry-After": str(self.config.retry_after)},
+                )
+
+        if self.random.random() < self.config.error_rate:
+            return web.json_response({"errors": [{"code": "internal"}]}, status=500)
+
+        response: web.Response = await handler(request)
+        return response
+
+    def _get_profile(self, request: web.Request) -> Profile:
+        """Return the profile of the request."""
+        try:
+            return self.profiles[request.match_info["profile"]]
+        except KeyError as err:
+            raise web.HTTPNotFound() from err
+
+    async def _profiles(self, request: web.Request) -> web.Response:
+        """Return the profiles."""
+        return web.json_response(
+            {
+                "data": [
+                    {
+                        "id": profile.id,
+                        "fingerprint": profile.fingerprint,
+                        "name": profile.name,
+                    }
+                    for profile in self.profiles.values()
+                ]
+            }
+        )
+
+    async def _profile(self, request: web.Request) -> web.Response:
+        """Return the profile with its settings."""
+        profile = self._get_profile(request)
+        return web.json_response(
+            {
+                "data": {
+                    "id": profile.id,
+                    "fingerprint": profile.fingerprint,
+                    "name": profile.name,
+                    "allowlist": [],
+                    "denylist": [],
+                    "rewrites": [],
+                    "setup": {},
+                    **profile.settings,
+                }
+            }
+        )
+
+    async def _analytics(self, request: web.Request) -> web.Response:
+        """Return the analytics of the profile, as time series for ;series."""
+        profile = self._get_profile(request)
+        api_type, _, form = request.match_info["type"].partition(";")
+        if api_type in TOP_LISTS and not form:
+            return self._top_list(profile, api_type, request)
+        if api_type not in ANALYTICS or form not in ("", "series"):
+            raise web.HTTPNotFound()
+        field_name, values = ANALYTICS[api_type]
+
+        if not form:
+            return web.json_response(
+                {
+                    "data": [
+                        {
+                            field_name: value,
+                            "queries": profile.queries[f"{api_type}:{value}"],
+                        }
+                        for value in values
+                    ]
+                }
+            )
+
+        # Hourly buckets since the requested time, the queries spread over them
+        interval = int(request.query.get("interval", 3600))
+        now = int(time.time())
+        start = int(request.query.get("from", now - 86400))
+        times = list(range(start - start % interval, now, interval))
+        return web.json_response(
+            {
+                "data": [
+                    {
+                        field_name: value,
+                        "queries": [
+                            profile.queries[f"{api_type}:{value}"] // max(len(times), 1)
+                        ]
+                        * len(times),
+                    }
+                    for value in values
+                ],
+                "meta": {
+                    "series": {
+                        "times": [
+                            datetime.fromtimestamp(bucket, timezone.utc).isoformat()
+                            for bucket in times
+                        ],
+                        "interval": interval,
+                    }
+                },
+            }
+        )
+
+    def _top_list(
+        self, profile: Profile, api_type: str, request: web.Request
+    ) -> web.Response:
+        """Return a top list with the queries shared out by rank."""
+        field_name, names = TOP_LISTS[api_type]
+        limit = int(request.query.get("limit", 10))
+        status = request.query.get("status", "")
+        total = sum(
+            count
+            for name, count in profile.queries.items()
+            if name.startswith(f"status:{status}")
+        )
+        return web.json_response(
+            {
+                "data": [
+                    {field_name: name, "queries": total // (rank + 2)}
+                    for rank, name in enumerate(names[:limit])
+                ]
+            }
+        )
+
+    async def _patch(self, request: web.Request) -> web.Response:
+        """Change settings of the profile."""
+        profile = self._get_profile(request)
+        section: dict[str, Any] = profile.settings
+        for part in request.match_info["path"].split("/"):
+            section = section.setdefault(part, {})
+        section.update(await request.json())
+        return web.Response(status=204)
+
+    async def _clear_logs(self, request: web.Request) -> web.Response:
+        """Clear the logs and analytics of the profile."""
+        self._get_profile(request).queries.clear()
+        return web.Response(status=204)
+
+    async def _test(self, request: web.Request) -> web.Response:
+        """Return the connection status of this device."""
+        profile = next(iter(self.profiles.values()))
+        return web.json_response({"status": "ok", "profile": profile.fingerprint})
+
+
+def _default_settings() -> dict[str, Any]:
+    """Return the settings of a new profile."""
+    return {
+        "settings": {
+            "blockPage": {"enabled": True},
+            "performance": {"cacheBoost": True, "cnameFlattening": True, "ecs": True},
+            "logs": {"enabled": True},
+            "web3": True,
+        },
+        "privacy": {"allowAffiliate": True, "disguisedTrackers": True},
+        "security": {
+            "aiThreatDetection": True,
+            "csam": True,
+            "ddns": True,
+            "nrd": False,
+            "parking": True,
+            "cryptojacking": True,
+            "dga": True,
+            "dnsRebinding": True,
+            "googleSafeBrowsing": False,
+            "idnHomographs": True,
+            "threatIntelligenceFeeds": True,
+            "typosquatting": True,
+        },
+        "parentalControl": {
+            "blockBypass": False,
+            "safeSearch": False,
+            "youtubeRestrictedMode": False,
+        },
+    }
@@ -0,0 +1,359 @@
+"""Benchmark the NextDNS integration against the local API stand-in.
+
+Run from the repository root with Home Assistant and nextdns installed:
+
+    python -m benchmarks.bench_nextdns --profiles 10 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+import json
+from pathlib import Path
+import statistics
+import tempfile
+import time
+from typing import Any
+from unittest.mock import patch
+
+import custom_components.nextdns as integration
+from custom_components.nextdns import NextDnsUpdateCoordinator
+from custom_components.nextdns.const import ATTR_ACCOUNTS, DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_OFF
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+
+from .api_standin import NextDnsStandIn, StandInConfig
+from .harness import async_home_assistant, profile_entry
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Return the percentile of the values with nearest-rank method."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary(values: list[float]) -> dict[str, float]:
+    """Return the summary of durations in milliseconds."""
+    return {
+        "count": len(values),
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": max(values, default=0.0) * 1000,
+    }
+
+
+async def timed(func: Callable[[], Awaitable[Any]]) -> float:
+    """Return the duration of the awaitable in seconds."""
+    start = time.perf_counter()
+    await func()
+    return time.perf_counter() - start
+
+
+def entry_coordinators(
+    hass: HomeAssistant, entry_id: str
+) -> dict[str, NextDnsUpdateCoordinator]:
+    """Return the coordinators of the config entry which fetch data."""
+    return {
+        key: coordinator
+        for key, coordinator in hass.data[DOMAIN][entry_id].items()
+        if isinstance(coordinator, NextDnsUpdateCoordinator)
+        and coordinator.enabled_keys
+    }
+
+
+def refreshed_coordinators(
+    hass: HomeAssistant, entry_ids: list[str]
+) -> list[tuple[str, NextDnsUpdateCoordinator]]:
+    """Return the coordinators of the entries, the shared ones only once."""
+    coordinators: dict[int, tuple[str, NextDnsUpdateCoordinator]] = {}
+    for entry_id in entry_ids:
+        for key, coordinator in entry_coordinators(hass, entry_id).items():
+            coordinators.setdefault(id(coordinator), (key, coordinator))
+    return list(coordinators.values())
+
+
+@contextmanager
+def measure_setup_entry() -> Iterator[list[float]]:
+    """Record the wall time of each call of async_setup_entry of the integration."""
+    durations: list[float] = []
+    setup_entry = integration.async_setup_entry
+
+    async def timed_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+        """Call async_setup_entry and record its duration."""
+        start = time.perf_counter()
+        try:
+            return await setup_entry(hass, entry)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    with patch.object(integration, "async_setup_entry", timed_setup_entry):
+        yield durations
+
+
+async def bench_setup(
+    hass: HomeAssistant,
+    standin: NextDnsStandIn,
+    setups: list[Callable[[], Awaitable[Any]]],
+) -> dict[str, Any]:
+    """Measure the setup of the config entries and the requests it makes."""
+    requests_before = sum(standin.requests.values())
+    with measure_setup_entry() as setup_entry_durations:
+        durations = [await timed(setup) for setup in setups]
+    ready = await timed(hass.async_block_till_done)
+
+    return {
+        **summary(durations),
+        "total_ms": sum(durations) * 1000,
+        "setup_entry": summary(setup_entry_durations),
+        "background_refresh_ms": ready * 1000,
+        "requests": sum(standin.requests.values()) - requests_before,
+    }
+
+
+async def bench_cold_setup(
+    hass: HomeAssistant, standin: NextDnsStandIn
+) -> dict[str, Any]:
+    """Measure adding a config entry for each profile of the stand-in, one by one."""
+    entries = [
+        profile_entry(profile.id, profile.name) for profile in standin.profiles.values()
+    ]
+    return await bench_setup(
+        hass,
+        standin,
+        [lambda entry=entry: hass.config_entries.async_add(entry) for entry in entries],
+    )
+
+
+async def bench_warm_setup(
+    hass: HomeAssistant, standin: NextDnsStandIn
+) -> dict[str, Any]:
+    """Measure the setup of the stored config entries like at the start.
+
+    Setting up the component sets up all its config entries at once, so they
+    cannot be set up one by one by their IDs. The time of each entry is the
+    time of its async_setup_entry.
+    """
+    return await bench_setup(
+        hass, standin, [lambda: async_setup_component(hass, DOMAIN, {})]
+    )
+
+
+async def async_unload_entries(hass: HomeAssistant) -> None:
+    """Unload the config entries, their stored data is written on stop."""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+def reset_request_budgets(hass: HomeAssistant) -> None:
+    """Refill the request budgets of the API keys and end their throttling.
+
+    The budget drained by earlier requests would otherwise add the wait for
+    tokens to the measured times, which then depend on the number of rounds.
+    """
+    for account in hass.data[DOMAIN].get(ATTR_ACCOUNTS, {}).values():
+        account.scheduler.tokens = float(account.scheduler.burst)
+        account.scheduler.throttled_until = 0.0
+
+
+async def bench_refresh(
+    hass: HomeAssistant,
+    standin: NextDnsStandIn,
+    entry_ids: list[str],
+    rounds: int,
+    queries: int,
+) -> dict[str, Any]:
+    """Measure coordinator refreshes and the polling load they cause.
+
+    The requests per hour are derived from the requests per refresh and the
+    update intervals of the coordinators: the shortest ones while the data
+    changes and the longest ones while it does not.
+    """
+    durations: dict[str, list[float]] = {}
+    requests: dict[str, int] = {}
+
+    for _ in range(rounds):
+        standin.add_queries(queries)
+        for key, coordinator in refreshed_coordinators(hass, entry_ids):
+            reset_request_budgets(hass)
+            requests_before = sum(standin.requests.values())
+            durations.setdefault(key, []).append(await timed(coordinator.async_refresh))
+            requests[key] = (
+                requests.get(key, 0) + sum(standin.requests.values()) - requests_before
+            )
+
+    per_hour = idle_per_hour = 0.0
+    intervals: dict[str, tuple[float, float]] = {}
+    for key, coordinator in refreshed_coordinators(hass, entry_ids):
+        intervals[key] = (
+            coordinator.min_update_interval.total_seconds(),
+            coordinator.max_update_interval.total_seconds(),
+        )
+        per_refresh = requests[key] / len(durations[key])
+        per_hour += per_refresh * 3600 / intervals[key][0]
+        idle_per_hour += per_refresh * 3600 / intervals[key][1]
+
+    return {
+        "coordinators": {
+            key: {
+                **summary(values),
+                "requests_per_refresh": requests[key] / len(values),
+                "min_update_interval_s": intervals[key][0],
+                "max_update_interval_s": intervals[key][1],
+            }
+            for key, values in durations.items()
+        },
+        "all": summary([value for values in durations.values() for value in values]),
+        "requests_per_profile_hour": per_hour / len(entry_ids),
+        "idle_requests_per_profile_hour": idle_per_hour / len(entry_ids),
+    }
+
+
+async def bench_switch_writes(
+    hass: HomeAssistant, standin: NextDnsStandIn, entry_id: str
+) -> dict[str, Any]:
+    """Measure turning off all switches of a profile at once."""
+    registry = er.async_get(hass)
+    entity_ids = [
+        entity.entity_id
+        for entity in er.async_entries_for_config_entry(registry, entry_id)
+        if entity.domain == "switch" and not entity.disabled
+    ]
+    reset_request_budgets(hass)
+    patches_before = standin.requests_for("PATCH")
+    duration = await timed(
+        lambda: hass.services.async_call(
+            "switch",
+            SERVICE_TURN_OFF,
+            {ATTR_ENTITY_ID: entity_ids},
+            blocking=True,
+        )
+    )
+
+    return {
+        "switches": len(entity_ids),
+        "duration_ms": duration * 1000,
+        "patch_requests": standin.requests_for("PATCH") - patches_before,
+    }
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmarks."""
+    standin = NextDnsStandIn(
+        args.profiles,
+        StandInConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            seed=args.seed,
+        ),
+    )
+    standin.add_queries(args.queries)
+    await standin.start()
+    results: dict[str, Any] = {
+        "config": vars(args),
+    }
+
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_home_assistant(Path(config_dir), standin) as hass:
+                results["cold_setup"] = await bench_cold_setup(hass, standin)
+                entry_ids = [
+                    entry.entry_id
+                    for entry in hass.config_entries.async_entries(DOMAIN)
+                ]
+                results["refresh"] = await bench_refresh(
+                    hass, standin, entry_ids, args.rounds, args.queries
+                )
+                results["switch_writes"] = await bench_switch_writes(
+                    hass, standin, entry_ids[0]
+                )
+                await async_unload_entries(hass)
+
+            # The second start uses the data stored by the first one
+            async with async_home_assistant(Path(config_dir), standin) as hass:
+                results["warm_setup"] = await bench_warm_setup(hass, standin)
+                await async_unload_entries(hass)
+    finally:
+        await standin.stop()
+
+    results["api"] = {
+        "requests": dict(standin.requests),
+        "rate_limited": standin.rate_limited,
+    }
+    return results
+
+
+def print_results(results: dict[str, Any]) -> None:
+    """Print the results in a readable form."""
+    for name in ("cold_setup", "warm_setup"):
+        setup = results[name]
+        print(
+            f"{name}: async_setup_entry p50 {setup['setup_entry']['p50_ms']:.1f} ms, "
+            f"p99 {setup['setup_entry']['p99_ms']:.1f} ms, "
+            f"total {setup['total_ms']:.1f} ms, background refresh "
+            f"{setup['background_refresh_ms']:.1f} ms, {setup['requests']} requests"
+        )
+    refresh = results["refresh"]
+    for key, values in refresh["coordinators"].items():
+        print(
+            f"refresh {key}: p50 {values['p50_ms']:.1f} ms, "
+            f"p99 {values['p99_ms']:.1f} ms, "
+            f"{values['requests_per_refresh']:.1f} requests per refresh, "
+            f"interval {values['min_update_interval_s']:.0f}-"
+            f"{values['max_update_interval_s']:.0f} s"
+        )
+    print(
+        f"refresh all: p50 {refresh['all']['p50_ms']:.1f} ms, "
+        f"p99 {refresh['all']['p99_ms']:.1f} ms"
+    )
+    print(
+        f"requests per profile per hour: {refresh['requests_per_profile_hour']:.1f} "
+        f"with changing data, {refresh['idle_requests_per_profile_hour']:.1f} idle"
+    )
+    writes = results["switch_writes"]
+    print(
+        f"switch writes: {writes['switches']} switches in "
+        f"{writes['duration_ms']:.1f} ms with {writes['patch_requests']} PATCH requests"
+    )
+    print(f"rate limited responses: {results['api']['rate_limited']}")
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20, help="refreshes per profile")
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=100,
+        help="DNS queries added before each round, 0 for unchanged data",
+    )
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit", type=float, default=None, help="requests per second"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the results to the file")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_main(args))
+    print_results(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark the load time of the NextDNS integration.
+
+Run from the repository root with Home Assistant and nextdns installed:
+
+    python -m benchmarks.bench_startup --profiles 10 --runs 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any
+
+import custom_components.nextdns as integration
+
+from .api_standin import NextDnsStandIn, StandInConfig
+from .bench_nextdns import (
+    async_unload_entries,
+    bench_cold_setup,
+    bench_warm_setup,
+    summary,
+)
+from .harness import async_home_assistant
+
+ROOT = Path(__file__).parent.parent
+PACKAGE = "custom_components.nextdns"
+
+# Modules Home Assistant has imported before it loads any integration
+PRELOADED = [
+    "aiohttp",
+    "homeassistant.config_entries",
+    "homeassistant.core",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+]
+
+# Modules imported only when an option or another integration needs them
+DEFERRED = ["diagnostics", "logs", "statistics", "system_health", "websocket"]
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+
+for name in {preloaded!r}:
+    importlib.import_module(name)
+before = set(sys.modules)
+times = {{}}
+for name in {modules!r}:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    times[name] = time.perf_counter() - start
+    if name == {package!r}:
+        loaded = sorted(set(sys.modules) - before)
+print(json.dumps({{"times": times, "loaded": loaded}}))
+"""
+
+
+def import_once(modules: list[str]) -> dict[str, Any]:
+    """Import the modules in a new interpreter and return the import times."""
+    script = IMPORT_SCRIPT.format(preloaded=PRELOADED, modules=modules, package=PACKAGE)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    data: dict[str, Any] = json.loads(result.stdout)
+    return data
+
+
+def bench_imports(runs: int) -> dict[str, Any]:
+    """Measure the cold import of the integration, its platforms and deferred modules.
+
+    The platforms are imported after the integration like Home Assistant does,
+    so their times do not include the modules the integration already loaded.
+    """
+    modules = [
+        PACKAGE,
+        *(f"{PACKAGE}.{platform}" for platform in integration.PLATFORMS),
+        *(f"{PACKAGE}.{module}" for module in DEFERRED),
+    ]
+    durations: dict[str, list[float]] = {name: [] for name in modules}
+    loaded: list[str] = []
+    for _ in range(runs):
+        data = import_once(modules)
+        loaded = data["loaded"]
+        for name, duration in data["times"].items():
+            durations[name].append(duration)
+
+    def median_ms(names: list[str]) -> float:
+        """Return the median of the summed import times of the modules."""
+        return (
+            statistics.median(map(sum, zip(*(durations[name] for name in names))))
+            * 1000
+        )
+
+    startup = modules[: 1 + len(integration.PLATFORMS)]
+    return {
+        "modules": {
+            name.removeprefix(f"{PACKAGE}."): summary(values)
+            for name, values in durations.items()
+        },
+        "startup_p50_ms": median_ms(startup),
+        "deferred_p50_ms": median_ms(modules[len(startup) :]),
+        "loaded_modules": len(loaded),
+        "loaded_components": [
+            name
+            for name in loaded
+            if name.startswith("homeassistant.components.") and name.count(".") == 2
+        ],
+    }
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmarks."""
+    results: dict[str, Any] = {
+        "config": vars(args),
+        "imports": bench_imports(args.runs),
+    }
+    standin = NextDnsStandIn(
+        args.profiles, StandInConfig(latency=args.latency, seed=args.seed)
+    )
+    await standin.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_home_assistant(Path(config_dir), standin) as hass:
+                results["cold_setup"] = await bench_cold_setup(hass, standin)
+                await async_unload_entries(hass)
+
+            # The second start uses the data stored by the first one
+            async with async_home_assistant(Path(config_dir), standin) as hass:
+                results["warm_setup"] = await bench_warm_setup(hass, standin)
+                await async_unload_entries(hass)
+    finally:
+        await standin.stop()
+
+    return results
+
+
+def print_results(results: dict[str, Any]) -> None:
+    """Print the results in a readable form."""
+    imports = results["imports"]
+    for name, values in imports["modules"].items():
+        print(
+            f"import {name}: p50 {values['p50_ms']:.1f} ms, "
+            f"max {values['max_ms']:.1f} ms"
+        )
+    print(
+        f"import at startup: p50 {imports['startup_p50_ms']:.1f} ms, "
+        f"{imports['loaded_modules']} modules loaded by the integration, "
+        f"components: {', '.join(imports['loaded_components']) or 'none'}"
+    )
+    print(f"import deferred: p50 {imports['deferred_p50_ms']:.1f} ms")
+    for name in ("cold_setup", "warm_setup"):
+        setup = results[name]
+        print(
+            f"{name}: async_setup_entry p50 {setup['setup_entry']['p50_ms']:.1f} ms, "
+            f"max {setup['setup_entry']['max_ms']:.1f} ms, "
+            f"entry setup total {setup['total_ms']:.1f} ms, "
+            f"{setup['requests']} requests"
+        )
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5)
+    parser.add_argument(
+        "--runs", type=int, default=5, help="interpreters started to measure imports"
+    )
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the results to the file")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_main(args))
+    print_results(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
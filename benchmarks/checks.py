@@ -0,0 +1,78 @@
+"""Checks of the helpers of the NextDNS integration which need no API.
+
+Run from the repository root with Home Assistant and nextdns installed:
+
+    python -m benchmarks.checks
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from nextdns.const import API_ENDPOINT
+
+from custom_components.nextdns.const import ATTR_ALLOWLIST, ATTR_DENYLIST
+from custom_components.nextdns.metrics import RequestMetrics
+from custom_components.nextdns.rates import CounterRate, SnapshotRates
+
+
+def check_reset_before_first_snapshot() -> None:
+    """A reset before the first snapshot does not make the next delta the total."""
+    rates = SnapshotRates(["all_queries"])
+    rates.mark_reset()
+    rates.update({"all_queries": 1000}, 0.0)
+    rates.update({"all_queries": 1010}, 60.0)
+    assert rates.values["all_queries"] == CounterRate(10, 10.0), rates.values
+
+
+def check_reset_after_snapshot() -> None:
+    """After a reset the new value of the counter is the delta."""
+    rates = SnapshotRates(["all_queries"])
+    rates.update({"all_queries": 1000}, 0.0)
+    rates.mark_reset()
+    rates.update({"all_queries": 30}, 60.0)
+    assert rates.values["all_queries"] == CounterRate(30, 30.0), rates.values
+
+
+def check_window_rollover() -> None:
+    """Queries leaving the window make the delta unknown or the net change."""
+    rates = SnapshotRates(["all_queries"])
+    rates.update({"all_queries": 1000}, 0.0)
+    # 20 new queries while 30 left the window
+    rates.update({"all_queries": 990}, 60.0)
+    assert rates.values["all_queries"] == CounterRate(), rates.values
+    # 20 new queries while 15 left the window, only the net change is known
+    rates.update({"all_queries": 995}, 120.0)
+    assert rates.values["all_queries"] == CounterRate(5, 5.0), rates.values
+
+
+def check_list_sync_endpoints() -> None:
+    """Syncing many domains leaves one endpoint per list and method."""
+    metrics = RequestMetrics()
+    for list_type in (ATTR_ALLOWLIST, ATTR_DENYLIST):
+        url = f"{API_ENDPOINT}/profiles/abc123/{list_type}"
+        metrics.endpoint("get", url)
+        for index in range(1000):
+            metrics.endpoint("post", url)
+            metrics.endpoint("delete", f"{url}/domain{index}.example.com")
+    endpoints = metrics.for_profile("abc123")
+    assert len(endpoints) == 6, sorted(endpoints)
+    assert "DELETE /profiles/{profile}/denylist/{item}" in endpoints, sorted(endpoints)
+
+
+CHECKS: list[Callable[[], None]] = [
+    check_reset_before_first_snapshot,
+    check_reset_after_snapshot,
+    check_window_rollover,
+    check_list_sync_endpoints,
+]
+
+
+def main() -> None:
+    """Run the checks, a failed check raises AssertionError."""
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__}: ok")
+
+
+if __name__ == "__main__":
+    main()
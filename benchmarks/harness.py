@@ -0,0 +1,76 @@
+"""Run the NextDNS integration in a Home Assistant instance against the stand-in."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from aiohttp import ClientResponse, ClientSession
+
+from custom_components.nextdns.const import CONF_PROFILE_ID, DOMAIN
+from homeassistant import config_entries
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+
+from .api_standin import NextDnsStandIn
+
+API_KEY = "benchmark-api-key"
+
+
+class StandInSession:
+    """Class to send requests for NextDNS hosts to the stand-in."""
+
+    def __init__(self, session: ClientSession, standin: NextDnsStandIn) -> None:
+        """Initialize."""
+        self._session = session
+        self._standin = standin
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> ClientResponse:
+        """Make an HTTP request to the stand-in."""
+        return await self._session.request(method, self._standin.rewrite(url), **kwargs)
+
+
+@asynccontextmanager
+async def async_home_assistant(
+    config_dir: Path, standin: NextDnsStandIn
+) -> AsyncIterator[HomeAssistant]:
+    """Start a Home Assistant instance which uses the stand-in API."""
+    hass = HomeAssistant()
+    hass.config.config_dir = str(config_dir)
+    hass.config.skip_pip = True
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    hass.state = CoreState.running
+
+    session = ClientSession()
+    try:
+        with patch(
+            "custom_components.nextdns.account.async_get_clientsession",
+            return_value=StandInSession(session, standin),
+        ):
+            yield hass
+    finally:
+        await hass.async_stop(force=True)
+        await session.close()
+
+
+def profile_entry(profile_id: str, title: str) -> config_entries.ConfigEntry:
+    """Return a config entry for a stand-in profile."""
+    return config_entries.ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title=title,
+        data={CONF_PROFILE_ID: profile_id, CONF_API_KEY: API_KEY},
+        source=config_entries.SOURCE_USER,
+        unique_id=profile_id,
+    )
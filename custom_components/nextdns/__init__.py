@@ -2,12 +2,19 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from http import HTTPStatus
+import json
 import logging
+import random
+from typing import Any
+import zlib
 
 from aiohttp.client_exceptions import ClientConnectorError
-import async_timeout
 from nextdns import (
+    AllAnalytics,
     AnalyticsDnssec,
     AnalyticsEncryption,
     AnalyticsIpVersions,
@@ -17,91 +24,250 @@ from nextdns import (
     ConnectionStatus,
     InvalidApiKeyError,
     NextDns,
+    ProfileIdNotFoundError,
     Settings,
 )
+from nextdns.const import API_ENDPOINT, ATTR_TEST, ENDPOINTS
 from nextdns.model import NextDnsData
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_point_in_utc_time,
+    async_track_time_interval,
+)
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
+from .account import async_get_account, async_release_account
+from .breaker import async_call_with_retry
 from .const import (
+    ATTR_ANALYTICS,
     ATTR_CONNECTION,
     ATTR_DNSSEC,
     ATTR_ENCRYPTION,
     ATTR_IP_VERSIONS,
+    ATTR_LAST_SYNC,
+    ATTR_LISTS,
+    ATTR_LOG_STREAM,
+    ATTR_PROFILES,
     ATTR_PROTOCOLS,
     ATTR_SETTINGS,
     ATTR_STATUS,
+    ATTR_TOP,
+    ATTR_TOP_BLOCKED_DOMAINS,
+    ATTR_TOP_DOMAINS,
+    ATTR_TOP_REASONS,
+    CONF_IMPORT_STATISTICS,
+    CONF_LOG_STREAM,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
     CONF_PROFILE_ID,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
     DOMAIN,
+    LIST_CACHE_TTL,
+    LIST_SYNC_BATCH,
+    PRIORITY_ANALYTICS,
+    PRIORITY_SETTINGS,
+    PRIORITY_WRITE,
+    SCHEDULE_JITTER,
+    SCHEDULE_JITTER_SHARE,
+    SETTINGS_VERIFY_DELAY,
+    SIGNAL_UPDATED,
+    STARTUP_REFRESH_SPREAD,
+    STATISTICS_IMPORT_INTERVAL,
+    TOP_LIST_SIZE,
     UPDATE_INTERVAL_ANALYTICS,
     UPDATE_INTERVAL_CONNECTION,
     UPDATE_INTERVAL_SETTINGS,
 )
+from .history import AnalyticsHistory
+from .lists import LIST_TYPES, DomainLists, normalize_domains
+from .ranking import Ranking, TopLists
+from .rates import SnapshotRates
+from .scheduler import request_priority
+from .services import async_setup_services
+from .storage import NextDnsStore
+from .writer import SettingsWriter
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["binary_sensor", "button", "sensor", "switch"]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the NextDNS component."""
+    async_setup_services(hass)
+    # The WebSocket commands and the API component are imported only when the
+    # frontend is loaded, the integration does not depend on them
+    if "websocket_api" in hass.config.components:
+        # pylint: disable=import-outside-toplevel
+        from .websocket import async_register_websocket_commands
+
+        async_register_websocket_commands(hass)
+
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up NextDNS as config entry."""
     api_key = entry.data[CONF_API_KEY]
     profile_id = entry.data[CONF_PROFILE_ID]
 
-    websession = async_get_clientsession(hass)
+    store = NextDnsStore(hass, entry.entry_id)
+    stored_data = await store.async_load()
+
     try:
-        with async_timeout.timeout(10):
-            nextdns = await NextDns.create(websession, api_key)
+        account = await async_get_account(
+            hass, api_key, entry.entry_id, stored_data.get(ATTR_PROFILES)
+        )
     except (ApiError, ClientConnectorError, asyncio.TimeoutError) as err:
         raise ConfigEntryNotReady from err
 
-    connection_coordinator = NextDnsConnectionUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_CONNECTION
+    nextdns = account.nextdns
+    try:
+        nextdns.get_profile_name(profile_id)
+    except ProfileIdNotFoundError:
+        # The profiles of an account shared with other entries or created from
+        # the stored profiles may be older than the profile of this entry
+        try:
+            await account.async_update_profiles()
+            nextdns.get_profile_name(profile_id)
+        except (
+            ApiError,
+            ClientConnectorError,
+            InvalidApiKeyError,
+            ProfileIdNotFoundError,
+            asyncio.TimeoutError,
+        ) as err:
+            async_release_account(hass, api_key, entry.entry_id)
+            raise ConfigEntryNotReady(f"Profile {profile_id} not found") from err
+
+    enabled_keys = async_get_enabled_keys(hass, entry)
+
+    min_interval = timedelta(
+        minutes=entry.options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL)
     )
-    dnssec_coordinator = NextDnsDnssecUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_ANALYTICS
+    max_interval = timedelta(
+        minutes=entry.options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL)
     )
-    encryption_coordinator = NextDnsEncryptionUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_ANALYTICS
+
+    connection_coordinator = async_subscribe_connection(
+        hass,
+        entry.entry_id,
+        ConnectionSubscriber(
+            nextdns,
+            profile_id,
+            store,
+            max(UPDATE_INTERVAL_CONNECTION, min_interval),
+            max_interval,
+        ),
+        enabled_keys[ATTR_CONNECTION],
     )
-    ip_versions_coordinator = NextDnsIpVersionsUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_ANALYTICS
+    analytics_coordinator = NextDnsAnalyticsUpdateCoordinator(
+        hass,
+        nextdns,
+        profile_id,
+        max(UPDATE_INTERVAL_ANALYTICS, min_interval),
+        max_interval,
+        enabled_keys[ATTR_ANALYTICS],
     )
     settings_coordinator = NextDnsSettingsUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_SETTINGS
-    )
-    protocols_coordinator = NextDnsProtocolsUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_ANALYTICS
+        hass,
+        nextdns,
+        profile_id,
+        max(UPDATE_INTERVAL_SETTINGS, min_interval),
+        max_interval,
+        enabled_keys[ATTR_SETTINGS],
     )
-    status_coordinator = NextDnsStatusUpdateCoordinator(
-        hass, nextdns, profile_id, UPDATE_INTERVAL_ANALYTICS
+
+    top_coordinator = NextDnsTopUpdateCoordinator(
+        hass,
+        nextdns,
+        profile_id,
+        max(UPDATE_INTERVAL_ANALYTICS, min_interval),
+        max_interval,
+        enabled_keys[ATTR_TOP],
     )
 
-    await asyncio.gather(
-        connection_coordinator.async_config_entry_first_refresh(),
-        dnssec_coordinator.async_config_entry_first_refresh(),
-        encryption_coordinator.async_config_entry_first_refresh(),
-        ip_versions_coordinator.async_config_entry_first_refresh(),
-        settings_coordinator.async_config_entry_first_refresh(),
-        protocols_coordinator.async_config_entry_first_refresh(),
-        status_coordinator.async_config_entry_first_refresh(),
+    lists_coordinator = NextDnsListsUpdateCoordinator(
+        hass,
+        nextdns,
+        profile_id,
+        max(UPDATE_INTERVAL_SETTINGS, min_interval),
+        max_interval,
+        enabled_keys[ATTR_LISTS],
     )
 
-    hass.data.setdefault(DOMAIN, {})
+    coordinators: dict[str, NextDnsUpdateCoordinator] = {
+        ATTR_ANALYTICS: analytics_coordinator,
+        ATTR_CONNECTION: connection_coordinator,
+        ATTR_LISTS: lists_coordinator,
+        ATTR_SETTINGS: settings_coordinator,
+        ATTR_TOP: top_coordinator,
+    }
+    store.nextdns = nextdns
+    store.coordinators = coordinators
+
+    # Coordinators without enabled entities are started on demand, when one of
+    # their entities is enabled and added to Home Assistant. Coordinators with
+    # stored data start with it and are refreshed in the background, spread
+    # over the first seconds by their phase, so only the coordinators without
+    # stored data delay the setup. The shared connection coordinator is started
+    # only by the entry which created it.
+    first_refreshes = []
+    for key, coordinator in coordinators.items():
+        if key == ATTR_CONNECTION:
+            if len(connection_coordinator.subscribers) > 1:
+                continue
+        else:
+            coordinator.store = store
+        if not coordinator.enabled_keys:
+            continue
+        if coordinator.async_restore_data(stored_data.get(key)):
+            entry.async_on_unload(coordinator.async_schedule_startup_refresh())
+        else:
+            first_refreshes.append(coordinator.async_config_entry_first_refresh())
+
+    try:
+        await asyncio.gather(*first_refreshes)
+    except ConfigEntryNotReady:
+        async_unsubscribe_connection(hass, entry.entry_id)
+        async_release_account(hass, api_key, entry.entry_id)
+        raise
+
     hass.data[DOMAIN].setdefault(entry.entry_id, {})
-    hass.data[DOMAIN][entry.entry_id][ATTR_CONNECTION] = connection_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_DNSSEC] = dnssec_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_ENCRYPTION] = encryption_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_IP_VERSIONS] = ip_versions_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_SETTINGS] = settings_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_PROTOCOLS] = protocols_coordinator
-    hass.data[DOMAIN][entry.entry_id][ATTR_STATUS] = status_coordinator
+    hass.data[DOMAIN][entry.entry_id].update(coordinators)
+
+    if entry.options.get(CONF_IMPORT_STATISTICS, False):
+        async_setup_statistics_import(
+            hass, entry, analytics_coordinator, enabled_keys[ATTR_ANALYTICS]
+        )
+
+    if entry.options.get(CONF_LOG_STREAM, False):
+        # pylint: disable=import-outside-toplevel
+        from .logs import NextDnsLogStream
+
+        log_stream = NextDnsLogStream(
+            hass, nextdns, profile_id, analytics_coordinator.profile_name
+        )
+        hass.data[DOMAIN][entry.entry_id][ATTR_LOG_STREAM] = log_stream
+        entry.async_on_unload(
+            log_stream.async_add_query_listener(top_coordinator.async_count_query)
+        )
+        log_stream.async_start()
+        entry.async_on_unload(log_stream.async_stop)
+
+    entry.async_on_unload(settings_coordinator.async_cancel_verify)
+    entry.async_on_unload(entry.add_update_listener(update_listener))
 
     hass.config_entries.async_setup_platforms(entry, PLATFORMS)
 
@@ -114,23 +280,177 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unsubscribe_connection(hass, entry.entry_id)
+        async_release_account(hass, entry.data[CONF_API_KEY], entry.entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a config entry."""
+    await NextDnsStore(hass, entry.entry_id).async_remove()
+
+
+async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Update listener."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+@callback
+def async_subscribe_connection(
+    hass: HomeAssistant,
+    entry_id: str,
+    subscriber: ConnectionSubscriber,
+    enabled_keys: set[str],
+) -> NextDnsConnectionUpdateCoordinator:
+    """Return the connection coordinator of this instance, create it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if (coordinator := domain_data.get(ATTR_CONNECTION)) is None:
+        coordinator = domain_data[ATTR_CONNECTION] = NextDnsConnectionUpdateCoordinator(
+            hass,
+            subscriber.nextdns,
+            subscriber.profile_id,
+            subscriber.update_interval,
+            subscriber.max_update_interval,
+            set(enabled_keys),
+        )
+
+    coordinator.async_subscribe(entry_id, subscriber)
+    for key in enabled_keys:
+        coordinator.async_enable_key(key)
+
+    return coordinator
+
+
+@callback
+def async_unsubscribe_connection(hass: HomeAssistant, entry_id: str) -> None:
+    """Unsubscribe the entry, remove the coordinator after the last entry."""
+    domain_data = hass.data[DOMAIN]
+
+    if (coordinator := domain_data.get(ATTR_CONNECTION)) is None:
+        return
+
+    coordinator.async_unsubscribe(entry_id)
+
+    if not coordinator.subscribers:
+        domain_data.pop(ATTR_CONNECTION)
+        coordinator.async_cancel_refresh()
+
+
+@callback
+def async_setup_statistics_import(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: NextDnsAnalyticsUpdateCoordinator,
+    analytics_types: set[str],
+) -> None:
+    """Import the analytics time series into long-term statistics periodically."""
+    if "recorder" not in hass.config.components:
+        _LOGGER.warning("Importing statistics requires the recorder integration")
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from .statistics import NextDnsStatisticsImporter
+
+    importer = NextDnsStatisticsImporter(
+        hass,
+        coordinator.nextdns,
+        coordinator.profile_id,
+        coordinator.profile_name,
+        analytics_types,
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, importer.async_import, STATISTICS_IMPORT_INTERVAL
+        )
+    )
+    hass.async_create_task(importer.async_import())
+
+
+@callback
+def async_get_enabled_keys(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, set[str]]:
+    """Return the data keys of enabled entities for each coordinator."""
+    # pylint: disable=import-outside-toplevel
+    from .binary_sensor import SENSORS as BINARY_SENSORS
+    from .sensor import LIST_SENSORS, RATE_SENSORS, SENSORS, TOP_SENSORS
+    from .switch import SWITCHES
+
+    registry = er.async_get(hass)
+    profile_id = entry.data[CONF_PROFILE_ID]
+
+    def enabled(platform: str, descriptions: Iterable[Any]) -> Iterator[Any]:
+        """Yield descriptions of entities that are enabled."""
+        for description in descriptions:
+            entity_id = registry.async_get_entity_id(
+                platform, DOMAIN, f"{profile_id}_{description.key}"
+            )
+            if entity_id is None:
+                if description.entity_registry_enabled_default:
+                    yield description
+            elif not registry.entities[entity_id].disabled:
+                yield description
+
+    return {
+        ATTR_ANALYTICS: {
+            description.coordinator_type
+            for description in enabled("sensor", (*SENSORS, *RATE_SENSORS))
+        },
+        ATTR_CONNECTION: {
+            description.key for description in enabled("binary_sensor", BINARY_SENSORS)
+        },
+        ATTR_LISTS: {
+            description.key for description in enabled("sensor", LIST_SENSORS)
+        },
+        ATTR_SETTINGS: {description.key for description in enabled("switch", SWITCHES)},
+        ATTR_TOP: {description.key for description in enabled("sensor", TOP_SENSORS)},
+    }
+
+
+@dataclass
+class UpdateCounters:
+    """Counters of updates delivered and suppressed by a coordinator."""
+
+    listeners_notified: int = 0
+    listeners_skipped: int = 0
+    states_written: int = 0
+    states_skipped: int = 0
+    update_failures: dict[str, int] = field(default_factory=dict)
+
+
 class NextDnsUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching NextDNS data API."""
 
+    request_priority = PRIORITY_SETTINGS
+
     def __init__(
         self,
         hass: HomeAssistant,
         nextdns: NextDns,
         profile_id: str,
         update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
     ) -> None:
         """Initialize."""
         self.nextdns = nextdns
         self.profile_id = profile_id
+        self.enabled_keys = enabled_keys
+        self.min_update_interval = update_interval
+        self.max_update_interval = max(max_update_interval, update_interval)
+        self._fetched_data: NextDnsData | None = None
+        self.stale = False
+        self.store: NextDnsStore | None = None
+        self.counters = UpdateCounters()
+        self._entity_listeners: list[CALLBACK_TYPE] = []
+        self._dispatched: tuple[Any, ...] | None = None
+        # Deterministic share of the interval by which refreshes of this profile
+        # and data are offset, so that profiles do not poll at the same moment
+        self.phase = (
+            zlib.crc32(f"{profile_id}_{type(self).__name__}".encode()) / 2**32
+        )
         self.profile_name = nextdns.get_profile_name(profile_id)
         self.device_info = DeviceInfo(
             configuration_url=f"https://my.nextdns.io/{profile_id}/setup",
@@ -142,90 +462,783 @@ class NextDnsUpdateCoordinator(DataUpdateCoordinator):
 
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
 
-    async def _async_update_data(self) -> NextDnsData:
-        """Update data via library."""
-        raise NotImplementedError("Update method not implemented")
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Listen for data updates."""
+        if not self._entity_listeners:
+            super().async_add_listener(self._async_dispatch)
+
+        self._entity_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove update listener."""
+            self.async_remove_listener(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_remove_listener(self, update_callback: CALLBACK_TYPE) -> None:
+        """Remove data update."""
+        self._entity_listeners.remove(update_callback)
+
+        if not self._entity_listeners:
+            super().async_remove_listener(self._async_dispatch)
+
+    @callback
+    def _async_dispatch(self) -> None:
+        """Notify listeners only if the data or availability has changed."""
+        state = self._dispatch_state()
+        if state == self._dispatched:
+            self.counters.listeners_skipped += 1
+            return
+
+        self._dispatched = state
+        self.counters.listeners_notified += 1
+
+        for update_callback in list(self._entity_listeners):
+            update_callback()
+        async_dispatcher_send(self.hass, SIGNAL_UPDATED)
+
+    def _dispatch_state(self) -> tuple[Any, ...]:
+        """Return the state which is dispatched to the listeners when it changes."""
+        return (self.last_update_success, self.stale, self.data)
+
+    @callback
+    def async_enable_key(self, key: str) -> None:
+        """Start fetching data for the key of an enabled entity."""
+        if key in self.enabled_keys:
+            return
+
+        self.enabled_keys.add(key)
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_reset_update_interval(self) -> None:
+        """Poll at the shortest interval again, e.g. after a user change."""
+        if self.update_interval == self.min_update_interval:
+            return
+
+        self.update_interval = self.min_update_interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_schedule_startup_refresh(self) -> CALLBACK_TYPE:
+        """Refresh restored data after the phase of the startup spread."""
 
+        async def refresh(_now: datetime) -> None:
+            """Refresh the data."""
+            await self.async_refresh()
 
-class NextDnsStatusUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS analytics status data from API."""
+        return async_call_later(self.hass, self.phase * STARTUP_REFRESH_SPREAD, refresh)
 
-    async def _async_update_data(self) -> AnalyticsStatus:
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh on the phase of the profile with jitter.
+
+        Refreshes are aligned to a grid of the update interval, offset by the
+        phase, and the grid point at least half an interval ahead is used.
+        """
+        if self.update_interval is None:
+            return
+
+        if self._polling_disabled():
+            return
+
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+        interval = self.update_interval.total_seconds()
+        now = dt_util.utcnow().timestamp()
+        offset = self.phase * interval
+        next_refresh = now + interval / 2
+        next_refresh += (offset - next_refresh) % interval
+        next_refresh += random.uniform(
+            0, min(SCHEDULE_JITTER, interval * SCHEDULE_JITTER_SHARE)
+        )
+
+        self._unsub_refresh = async_track_point_in_utc_time(
+            self.hass, self._job, dt_util.utc_from_timestamp(next_refresh)
+        )
+
+    def _polling_disabled(self) -> bool:
+        """Return True if the user turned off polling of the config entry."""
+        return self.config_entry is not None and self.config_entry.pref_disable_polling
+
+    @callback
+    def async_cancel_refresh(self) -> None:
+        """Cancel the scheduled and the requested refreshes."""
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        self._debounced_refresh.async_cancel()
+
+    async def _async_update_data(self) -> NextDnsData:
         """Update data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_analytics_status(self.profile_id)
-        except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
-            raise UpdateFailed(err) from err
+            with request_priority(self.request_priority):
+                data = await async_call_with_retry(self._async_fetch_data)
+        except (UpdateFailed, asyncio.TimeoutError) as err:
+            reason = _failure_reason(err)
+            failures = self.counters.update_failures
+            failures[reason] = failures.get(reason, 0) + 1
+            raise
 
+        # Back off exponentially while the API responses do not change and poll at
+        # the shortest interval again as soon as they change.
+        if data != self._fetched_data:
+            self.update_interval = self.min_update_interval
+        else:
+            self.update_interval = min(
+                self.update_interval * 2, self.max_update_interval
+            )
+        self._fetched_data = data
+        self.stale = False
 
-class NextDnsDnssecUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS analytics Dnssec data from API."""
+        if self.store is not None:
+            self.store.async_schedule_save()
+
+        return data
+
+    async def _async_fetch_data(self) -> NextDnsData:
+        """Fetch data via library."""
+        raise NotImplementedError("Update method not implemented")
+
+    @callback
+    def async_restore_data(self, data: dict[str, Any] | None) -> bool:
+        """Restore the stored data, it is stale until the next refresh."""
+        if data is None:
+            return False
 
-    async def _async_update_data(self) -> AnalyticsDnssec:
-        """Update data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_analytics_dnssec(self.profile_id)
-        except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
-            raise UpdateFailed(err) from err
+            self.data = self._restore_data(data)
+        except (KeyError, TypeError):
+            # The data was stored by another version of the library
+            return False
 
+        self.stale = True
+        return True
 
-class NextDnsEncryptionUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS analytics encryption data from API."""
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> NextDnsData:
+        """Create the data object from the stored data."""
+        raise NotImplementedError
+
+
+class NextDnsAnalyticsUpdateCoordinator(NextDnsUpdateCoordinator):
+    """Class to manage fetching NextDNS analytics data from API."""
+
+    request_priority = PRIORITY_ANALYTICS
+
+    # Status counters with rates derived from consecutive fetches
+    rate_keys = ("all_queries", "blocked_queries")
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
+    ) -> None:
+        """Initialize."""
+        self.rates = SnapshotRates(self.rate_keys)
+        self.history = AnalyticsHistory()
+
+        super().__init__(
+            hass,
+            nextdns,
+            profile_id,
+            update_interval,
+            max_update_interval,
+            enabled_keys,
+        )
+
+    def _dispatch_state(self) -> tuple[Any, ...]:
+        """Return the state which is dispatched to the listeners when it changes."""
+        return (*super()._dispatch_state(), tuple(self.rates.values.values()))
+
+    async def async_clear_logs(self) -> None:
+        """Clear the logs of the profile, the counters start from zero."""
+        with request_priority(PRIORITY_WRITE):
+            if not await self.nextdns.clear_logs(self.profile_id):
+                raise ApiError("Logs not cleared")
+        self.rates.mark_reset()
+
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> AllAnalytics:
+        """Create the data object from the stored data."""
+        return AllAnalytics(
+            dnssec=AnalyticsDnssec(**data[ATTR_DNSSEC]),
+            encryption=AnalyticsEncryption(**data[ATTR_ENCRYPTION]),
+            ip_versions=AnalyticsIpVersions(**data[ATTR_IP_VERSIONS]),
+            protocols=AnalyticsProtocols(**data[ATTR_PROTOCOLS]),
+            status=AnalyticsStatus(**data[ATTR_STATUS]),
+        )
+
+    async def _async_fetch_data(self) -> AllAnalytics:
+        """Fetch data via library."""
+        analytics = {
+            ATTR_DNSSEC: AnalyticsDnssec(),
+            ATTR_ENCRYPTION: AnalyticsEncryption(),
+            ATTR_IP_VERSIONS: AnalyticsIpVersions(),
+            ATTR_PROTOCOLS: AnalyticsProtocols(),
+            ATTR_STATUS: AnalyticsStatus(),
+        }
+        methods = {
+            ATTR_DNSSEC: self.nextdns.get_analytics_dnssec,
+            ATTR_ENCRYPTION: self.nextdns.get_analytics_encryption,
+            ATTR_IP_VERSIONS: self.nextdns.get_analytics_ip_versions,
+            ATTR_PROTOCOLS: self.nextdns.get_analytics_protocols,
+            ATTR_STATUS: self.nextdns.get_analytics_status,
+        }
+        # Only the analytics with enabled sensors are requested from the API
+        analytics_types = [key for key in methods if key in self.enabled_keys]
 
-    async def _async_update_data(self) -> AnalyticsEncryption:
-        """Update data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_analytics_encryption(self.profile_id)
+            results = await asyncio.gather(
+                *(methods[key](self.profile_id) for key in analytics_types)
+            )
         except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
             raise UpdateFailed(err) from err
 
+        analytics.update(zip(analytics_types, results))
+        data = AllAnalytics(**analytics)
+        self.history.append_analytics(
+            dt_util.utcnow().timestamp(), data, analytics_types
+        )
 
-class NextDnsIpVersionsUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS analytics IP versions data from API."""
+        if ATTR_STATUS in analytics_types:
+            self.rates.update(
+                {key: getattr(data.status, key) for key in self.rate_keys},
+                self.hass.loop.time(),
+            )
+
+        return data
+
+
+class NextDnsTopUpdateCoordinator(NextDnsUpdateCoordinator):
+    """Class to manage fetching NextDNS top domains and block reasons from API."""
+
+    request_priority = PRIORITY_ANALYTICS
+
+    # Top list: analytics endpoint, field with the name and query parameters
+    top_lists = {
+        ATTR_TOP_DOMAINS: ("domains", "domain", ""),
+        ATTR_TOP_BLOCKED_DOMAINS: ("domains", "domain", "status=blocked&"),
+        ATTR_TOP_REASONS: ("reasons", "name", ""),
+    }
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
+    ) -> None:
+        """Initialize."""
+        self.rankings = {key: Ranking() for key in self.top_lists}
+
+        super().__init__(
+            hass,
+            nextdns,
+            profile_id,
+            update_interval,
+            max_update_interval,
+            enabled_keys,
+        )
+
+    @callback
+    def async_restore_data(self, data: dict[str, Any] | None) -> bool:
+        """Restore the stored data and the rankings."""
+        if not super().async_restore_data(data):
+            return False
+
+        for key, ranking in self.rankings.items():
+            ranking.replace(getattr(self.data, key))
+        return True
+
+    @callback
+    def async_count_query(self, query: dict[str, Any]) -> None:
+        """Count a query from the log stream into the rankings."""
+        domain = query.get("domain")
+        changed = self.rankings[ATTR_TOP_DOMAINS].count(domain)
+        if query.get("status") == "blocked":
+            changed |= self.rankings[ATTR_TOP_BLOCKED_DOMAINS].count(domain)
+            for reason in query.get("reasons") or []:
+                changed |= self.rankings[ATTR_TOP_REASONS].count(reason.get("name"))
+
+        if changed:
+            self._async_dispatch()
+
+    def _dispatch_state(self) -> tuple[Any, ...]:
+        """Return the state which is dispatched to the listeners when it changes.
+
+        The rankings change with the log stream also when the data does not.
+        """
+        rankings = tuple(tuple(ranking.names) for ranking in self.rankings.values())
+        return (*super()._dispatch_state(), rankings)
+
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> TopLists:
+        """Create the data object from the stored data."""
+        return TopLists(**data)
+
+    async def _async_fetch_data(self) -> TopLists:
+        """Fetch data via library."""
+        # Only the top lists with enabled sensors are requested from the API
+        keys = [key for key in self.top_lists if key in self.enabled_keys]
 
-    async def _async_update_data(self) -> AnalyticsIpVersions:
-        """Update data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_analytics_ip_versions(self.profile_id)
+            results = await asyncio.gather(
+                *(self._async_fetch_top_list(key) for key in keys)
+            )
         except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
             raise UpdateFailed(err) from err
 
+        data = TopLists(**dict(zip(keys, results)))
 
-class NextDnsProtocolsUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS analytics protocols data from API."""
+        # The listeners are notified by the refresh when the rankings changed
+        for key in keys:
+            self.rankings[key].replace(getattr(data, key))
+
+        return data
+
+    async def _async_fetch_top_list(self, key: str) -> list[list[str | int]]:
+        """Fetch a top list, the library has no methods for them."""
+        endpoint, name, params = self.top_lists[key]
+        url = (
+            f"{API_ENDPOINT}/profiles/{self.profile_id}/analytics/{endpoint}"
+            f"?{params}limit={TOP_LIST_SIZE}"
+        )
+        # pylint: disable=protected-access
+        items = await self.nextdns._http_request("get", url)
+        return [[item[name], item["queries"]] for item in items]
+
+
+class NextDnsListsUpdateCoordinator(NextDnsUpdateCoordinator):
+    """Class to manage fetching and syncing NextDNS denylist and allowlist."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
+    ) -> None:
+        """Initialize."""
+        self._lists_fetched: dict[str, float] = {}
+        self._sync_lock = asyncio.Lock()
+
+        super().__init__(
+            hass,
+            nextdns,
+            profile_id,
+            update_interval,
+            max_update_interval,
+            enabled_keys,
+        )
+
+    async def async_sync_list(
+        self, list_type: str, domains: Iterable[str]
+    ) -> dict[str, int]:
+        """Make the list equal to the domains, only the changes are written.
+
+        The cached list is used if it was fetched within LIST_CACHE_TTL seconds.
+        Additions and removals are sent in batches of LIST_SYNC_BATCH requests,
+        every request takes a token of the request budget of the API key. After
+        a batch with failed changes no more batches are sent and the changes
+        which were not applied are raised in one HomeAssistantError.
+        """
+        async with self._sync_lock:
+            current = set(await self._async_get_list(list_type))
+            desired = normalize_domains(domains)
+            changes = [("post", domain) for domain in sorted(desired - current)]
+            changes += [("delete", domain) for domain in sorted(current - desired)]
+
+            _LOGGER.debug(
+                "Syncing %s of profile %s with %s changes",
+                list_type,
+                self.profile_id,
+                len(changes),
+            )
+
+            synced = set(current)
+            failed: list[tuple[str, str]] = []
+            error: BaseException | None = None
+            for index in range(0, len(changes), LIST_SYNC_BATCH):
+                batch = changes[index : index + LIST_SYNC_BATCH]
+                with request_priority(PRIORITY_ANALYTICS):
+                    results = await asyncio.gather(
+                        *(
+                            self._async_change_list(list_type, method, domain)
+                            for method, domain in batch
+                        ),
+                        return_exceptions=True,
+                    )
+                for (method, domain), result in zip(batch, results):
+                    if isinstance(result, BaseException):
+                        failed.append((method, domain))
+                        error = error or result
+                    elif method == "post":
+                        synced.add(domain)
+                    else:
+                        synced.discard(domain)
+                if failed:
+                    failed += changes[index + LIST_SYNC_BATCH :]
+                    break
+
+            if failed:
+                # The state of the failed changes is unknown, fetch it next time
+                self._lists_fetched.pop(list_type, None)
+                self._async_update_lists({list_type: sorted(synced)})
+                raise HomeAssistantError(
+                    f"{len(failed)} of {len(changes)} changes of the {list_type} "
+                    f"not applied ({str(error) or type(error).__name__}): "
+                    f"{_format_changes(failed)}"
+                ) from error
+
+            self._async_update_lists(
+                {
+                    list_type: sorted(synced),
+                    ATTR_LAST_SYNC: dt_util.utcnow().isoformat(),
+                }
+            )
+
+        return {"added": len(desired - current), "removed": len(current - desired)}
+
+    @callback
+    def _async_update_lists(self, changes: dict[str, Any]) -> None:
+        """Update the cached lists, notify entities and store them."""
+        self.async_set_updated_data(replace(self.data or DomainLists(), **changes))
+        if self.store is not None:
+            self.store.async_schedule_save()
+
+    async def _async_get_list(self, list_type: str) -> list[str]:
+        """Return the cached list, fetch it if it is missing or too old."""
+        fetched = self._lists_fetched.get(list_type)
+        if (
+            self.data is None
+            or fetched is None
+            or self.hass.loop.time() - fetched > LIST_CACHE_TTL
+        ):
+            with request_priority(PRIORITY_ANALYTICS):
+                fetched_domains = await self._async_fetch_list(list_type)
+            self._async_update_lists({list_type: fetched_domains})
+            return fetched_domains
+
+        domains: list[str] = getattr(self.data, list_type)
+        return domains
+
+    async def _async_fetch_list(self, list_type: str) -> list[str]:
+        """Fetch the domains of the list, the library has no methods for it."""
+        url = f"{API_ENDPOINT}/profiles/{self.profile_id}/{list_type}"
+        # pylint: disable=protected-access
+        items = await self.nextdns._http_request("get", url)
+        self._lists_fetched[list_type] = self.hass.loop.time()
+        return sorted(normalize_domains(item["id"] for item in items))
+
+    async def _async_change_list(
+        self, list_type: str, method: str, domain: str
+    ) -> None:
+        """Add the domain to the list or remove it from the list."""
+        url = f"{API_ENDPOINT}/profiles/{self.profile_id}/{list_type}"
+        # pylint: disable=protected-access
+        kwargs: dict[str, Any] = {"headers": self.nextdns._headers}
+        if method == "post":
+            kwargs["data"] = json.dumps({"id": domain, "active": True})
+        else:
+            url = f"{url}/{domain}"
+
+        # The responses of these requests have no data, so they are not made by
+        # the library, which expects JSON in every response
+        resp = await self.nextdns._session.request(method, url, **kwargs)
+        resp.release()
+
+        if resp.status == HTTPStatus.FORBIDDEN.value:
+            raise InvalidApiKeyError
+        # A removed domain which is already gone is fine
+        if resp.status >= HTTPStatus.BAD_REQUEST.value and not (
+            method == "delete" and resp.status == HTTPStatus.NOT_FOUND.value
+        ):
+            raise ApiError(f"{resp.status}, {list_type} not changed")
+
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> DomainLists:
+        """Create the data object from the stored data."""
+        return DomainLists(**data)
+
+    async def _async_fetch_data(self) -> DomainLists:
+        """Fetch data via library."""
+        # Only the lists with enabled sensors are requested from the API
+        list_types = [key for key in LIST_TYPES if key in self.enabled_keys]
 
-    async def _async_update_data(self) -> AnalyticsProtocols:
-        """Update data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_analytics_protocols(self.profile_id)
+            results = await asyncio.gather(
+                *(self._async_fetch_list(key) for key in list_types)
+            )
         except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
             raise UpdateFailed(err) from err
 
+        return replace(self.data or DomainLists(), **dict(zip(list_types, results)))
+
+
+@dataclass
+class ConnectionSubscriber:
+    """Config entry subscribed to the shared connection coordinator."""
+
+    nextdns: NextDns
+    profile_id: str
+    store: NextDnsStore
+    update_interval: timedelta
+    max_update_interval: timedelta
+
 
 class NextDnsConnectionUpdateCoordinator(NextDnsUpdateCoordinator):
-    """Class to manage fetching NextDNS connection data from API."""
+    """Class to manage fetching the connection status of this host from API.
 
-    async def _async_update_data(self) -> ConnectionStatus:
-        """Update data via library."""
+    The status does not depend on the profile, so one coordinator is shared by
+    all entries. It probes with the client of one subscribed entry and matches
+    the profile used by this host with the profiles of all subscribed entries.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
+    ) -> None:
+        """Initialize."""
+        self.subscribers: dict[str, ConnectionSubscriber] = {}
+
+        super().__init__(
+            hass,
+            nextdns,
+            profile_id,
+            update_interval,
+            max_update_interval,
+            enabled_keys,
+        )
+        # Not bound to the entry which created it, it outlives the entry
+        self.config_entry = None
+
+    @callback
+    def async_subscribe(self, entry_id: str, subscriber: ConnectionSubscriber) -> None:
+        """Subscribe the entry to the connection status."""
+        self.subscribers[entry_id] = subscriber
+        self._async_update_subscribers()
+
+    @callback
+    def async_unsubscribe(self, entry_id: str) -> None:
+        """Unsubscribe the entry from the connection status."""
+        self.subscribers.pop(entry_id, None)
+        if self.subscribers:
+            self._async_update_subscribers()
+
+    @callback
+    def _async_update_subscribers(self) -> None:
+        """Probe with the first entry and poll as often as the entries allow."""
+        subscriber = next(iter(self.subscribers.values()))
+        self.nextdns = subscriber.nextdns
+        self.profile_id = subscriber.profile_id
+        self.store = subscriber.store
+
+        subscribers = self.subscribers.values()
+        self.min_update_interval = min(item.update_interval for item in subscribers)
+        self.max_update_interval = max(
+            min(item.max_update_interval for item in subscribers),
+            self.min_update_interval,
+        )
+        self.update_interval = min(
+            max(self.update_interval, self.min_update_interval),
+            self.max_update_interval,
+        )
+
+    def _polling_disabled(self) -> bool:
+        """Return True if all subscribed entries turned off polling."""
+        return all(
+            (entry := self.hass.config_entries.async_get_entry(entry_id)) is not None
+            and entry.pref_disable_polling
+            for entry_id in self.subscribers
+        )
+
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> ConnectionStatus:
+        """Create the data object from the stored data."""
+        return ConnectionStatus(**data)
+
+    async def _async_fetch_data(self) -> ConnectionStatus:
+        """Fetch data via library."""
+        url = ENDPOINTS[ATTR_TEST].format(profile_id=self.profile_id)
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.connection_status(self.profile_id)
+            # The library matches the profile only with the profiles of its
+            # own API key, the entries may use several API keys
+            # pylint: disable=protected-access
+            resp = await self.nextdns._http_request("get", url)
         except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
             raise UpdateFailed(err) from err
 
+        used_profile_id = None
+        if connected := resp["status"] == "ok":
+            for subscriber in self.subscribers.values():
+                for profile in subscriber.nextdns.profiles:
+                    if profile.fingerprint == resp.get("profile"):
+                        used_profile_id = profile.id
+
+        return ConnectionStatus(connected, used_profile_id)
+
 
 class NextDnsSettingsUpdateCoordinator(NextDnsUpdateCoordinator):
     """Class to manage fetching NextDNS connection data from API."""
 
-    async def _async_update_data(self) -> Settings:
-        """Update data via library."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        update_interval: timedelta,
+        max_update_interval: timedelta,
+        enabled_keys: set[str],
+    ) -> None:
+        """Initialize."""
+        super().__init__(
+            hass,
+            nextdns,
+            profile_id,
+            update_interval,
+            max_update_interval,
+            enabled_keys,
+        )
+        self.writer = SettingsWriter(hass, nextdns, profile_id)
+        self._unsub_verify: CALLBACK_TYPE | None = None
+
+    async def async_set_setting(self, setting: str, state: bool) -> bool:
+        """Change a setting, changes made at the same time are written together.
+
+        The cached settings are updated before the write and the change is rolled
+        back if the write fails.
+        """
+        previous_state = getattr(self.data, setting, None)
+        self._async_update_setting(setting, state)
+
+        try:
+            result = await self.writer.async_set_setting(setting, state)
+        except Exception:
+            self._async_update_setting(setting, previous_state)
+            raise
+
+        if not result:
+            self._async_update_setting(setting, previous_state)
+            return False
+
+        self.async_reset_update_interval()
+        self._async_schedule_verify()
+
+        return True
+
+    async def async_set_settings(self, settings: dict[str, bool]) -> bool:
+        """Change several settings at once for a bulk change of many profiles.
+
+        The cached settings are updated once and the changes which fail are
+        rolled back. The writes are not verified with a refresh, the settings
+        are polled as usual.
+        """
+        previous = {setting: getattr(self.data, setting, None) for setting in settings}
+        self._async_update_settings(settings)
+
+        results = await asyncio.gather(
+            *(
+                self.writer.async_set_setting(setting, state)
+                for setting, state in settings.items()
+            ),
+            return_exceptions=True,
+        )
+
+        failed = {
+            setting: previous[setting]
+            for setting, result in zip(settings, results)
+            if result is not True
+        }
+        self._async_update_settings(failed)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return not failed
+
+    @callback
+    def _async_update_setting(self, setting: str, state: bool | None) -> None:
+        """Update one setting in the cached settings and notify entities."""
+        self._async_update_settings({setting: state})
+
+    @callback
+    def _async_update_settings(self, settings: dict[str, bool | None]) -> None:
+        """Update settings in the cached settings and notify entities."""
+        changes = {
+            setting: state for setting, state in settings.items() if state is not None
+        }
+        if self.data is None or not changes:
+            return
+
+        self.async_set_updated_data(replace(self.data, **changes))
+
+    @callback
+    def _async_schedule_verify(self) -> None:
+        """Schedule one refresh to verify the settings after a burst of writes."""
+        self.async_cancel_verify()
+        self._unsub_verify = async_call_later(
+            self.hass, SETTINGS_VERIFY_DELAY, self._async_verify
+        )
+
+    @callback
+    def async_cancel_verify(self) -> None:
+        """Cancel the scheduled verification refresh."""
+        if self._unsub_verify is not None:
+            self._unsub_verify()
+            self._unsub_verify = None
+
+    async def _async_verify(self, _now: datetime) -> None:
+        """Refresh the settings to verify the writes."""
+        self._unsub_verify = None
+        await self.async_refresh()
+
+    @staticmethod
+    def _restore_data(data: dict[str, Any]) -> Settings:
+        """Create the data object from the stored data."""
+        return Settings(**data)
+
+    async def _async_fetch_data(self) -> Settings:
+        """Fetch data via library."""
         try:
-            with async_timeout.timeout(10):
-                return await self.nextdns.get_settings(self.profile_id)
+            return await self.nextdns.get_settings(self.profile_id)
         except (ApiError, ClientConnectorError, InvalidApiKeyError) as err:
             raise UpdateFailed(err) from err
+
+
+def _format_changes(changes: list[tuple[str, str]]) -> str:
+    """Return the list changes as +domain and -domain, at most LIST_SYNC_BATCH."""
+    names = [
+        f"{'+' if method == 'post' else '-'}{domain}"
+        for method, domain in changes[:LIST_SYNC_BATCH]
+    ]
+    if len(changes) > LIST_SYNC_BATCH:
+        names.append(f"and {len(changes) - LIST_SYNC_BATCH} more")
+    return ", ".join(names)
+
+
+def _failure_reason(err: Exception) -> str:
+    """Return the reason of a failed update for the counters."""
+    cause = err.__cause__ or err
+    if isinstance(cause, ApiError):
+        return f"{type(cause).__name__}: {cause}"
+    return type(cause).__name__
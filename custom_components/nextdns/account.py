@@ -0,0 +1,163 @@
+"""Shared NextDNS API clients for config entries using the same API key."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+from typing import Any
+
+from aiohttp.client_exceptions import ClientConnectorError
+from nextdns import ApiError, NextDns
+from nextdns.model import ProfileInfo
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .breaker import CircuitBreaker
+from .const import ACCOUNT_HAND_OVER_TIMEOUT, ATTR_ACCOUNTS, ATTR_ACCOUNTS_LOCKS, DOMAIN
+from .metrics import RequestMetrics
+from .scheduler import RequestScheduler, ScheduledSession
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NextDnsAccount:
+    """Class to share one NextDNS client between config entries."""
+
+    def __init__(
+        self,
+        api_key: str,
+        nextdns: NextDns,
+        scheduler: RequestScheduler,
+        metrics: RequestMetrics,
+        breaker: CircuitBreaker,
+    ) -> None:
+        """Initialize."""
+        self.api_key = api_key
+        self.nextdns = nextdns
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.breaker = breaker
+        self.entry_ids: set[str] = set()
+
+    async def async_update_profiles(self) -> None:
+        """Fetch the profiles of the API key again."""
+        await self.nextdns.initialize()
+
+    def shutdown(self) -> None:
+        """Cancel the waiting requests and the probes of the account."""
+        self.scheduler.shutdown()
+        self.breaker.shutdown()
+
+
+@callback
+def async_new_account(
+    hass: HomeAssistant, api_key: str, profiles: list[ProfileInfo] | None = None
+) -> NextDnsAccount:
+    """Create the account for the API key without requests, with known profiles."""
+    scheduler = RequestScheduler(hass.loop)
+    metrics = RequestMetrics()
+    websession = ScheduledSession(async_get_clientsession(hass), scheduler, metrics)
+    nextdns = NextDns(websession, api_key)  # type: ignore[arg-type]
+    if profiles is not None:
+        # pylint: disable=protected-access
+        nextdns._profiles = profiles
+
+    return NextDnsAccount(api_key, nextdns, scheduler, metrics, websession.breaker)
+
+
+async def async_create_account(
+    hass: HomeAssistant, api_key: str, profiles: list[dict[str, Any]] | None = None
+) -> NextDnsAccount:
+    """Create the account for the API key and fetch the profiles.
+
+    If NextDNS API cannot be reached, the client is created from the stored
+    profiles, when there are any.
+    """
+    account = async_new_account(hass, api_key)
+    try:
+        await account.nextdns.initialize()
+    except (ApiError, ClientConnectorError, asyncio.TimeoutError) as err:
+        if not profiles:
+            account.shutdown()
+            raise
+        _LOGGER.debug("Using stored profiles, fetching them failed: %s", err)
+        # pylint: disable=protected-access
+        account.nextdns._profiles = [ProfileInfo(**profile) for profile in profiles]
+    except Exception:
+        account.shutdown()
+        raise
+
+    return account
+
+
+async def async_get_account(
+    hass: HomeAssistant,
+    api_key: str,
+    entry_id: str,
+    profiles: list[dict[str, Any]] | None = None,
+) -> NextDnsAccount:
+    """Return the account for the API key, create it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    accounts: dict[str, NextDnsAccount] = domain_data.setdefault(ATTR_ACCOUNTS, {})
+    locks: dict[str, asyncio.Lock] = domain_data.setdefault(ATTR_ACCOUNTS_LOCKS, {})
+
+    async with locks.setdefault(api_key, asyncio.Lock()):
+        if (account := accounts.get(api_key)) is None:
+            account = accounts[api_key] = await async_create_account(
+                hass, api_key, profiles
+            )
+
+    account.entry_ids.add(entry_id)
+
+    return account
+
+
+@callback
+def async_hand_over_account(
+    hass: HomeAssistant, api_key: str, profiles: list[ProfileInfo]
+) -> None:
+    """Hand over the profiles fetched by the config flow to the entries setup.
+
+    The account is created without requests and removed if no entry has used
+    it after a timeout. When the API key already has an account, only its
+    profiles are updated.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    accounts: dict[str, NextDnsAccount] = domain_data.setdefault(ATTR_ACCOUNTS, {})
+
+    if (existing := accounts.get(api_key)) is not None:
+        # pylint: disable=protected-access
+        existing.nextdns._profiles = profiles
+        return
+
+    account = accounts[api_key] = async_new_account(hass, api_key, profiles)
+
+    @callback
+    def remove_unused_account(_now: datetime) -> None:
+        """Remove the account if no entry uses it."""
+        if accounts.get(account.api_key) is account and not account.entry_ids:
+            accounts.pop(account.api_key)
+            account.shutdown()
+
+    async_call_later(hass, ACCOUNT_HAND_OVER_TIMEOUT, remove_unused_account)
+
+
+@callback
+def async_release_account(hass: HomeAssistant, api_key: str, entry_id: str) -> None:
+    """Release the account for the entry, remove it after the last entry."""
+    domain_data = hass.data[DOMAIN]
+    accounts: dict[str, NextDnsAccount] = domain_data[ATTR_ACCOUNTS]
+
+    if (account := accounts.get(api_key)) is None:
+        return
+
+    account.entry_ids.discard(entry_id)
+
+    if not account.entry_ids:
+        accounts.pop(api_key)
+        account.shutdown()
+        lock = domain_data[ATTR_ACCOUNTS_LOCKS].get(api_key)
+        if lock is not None and not lock.locked():
+            domain_data[ATTR_ACCOUNTS_LOCKS].pop(api_key)
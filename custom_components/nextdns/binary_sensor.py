@@ -10,12 +10,12 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import NextDnsConnectionUpdateCoordinator
-from .const import ATTR_CONNECTION, DOMAIN
+from .const import ATTR_ANALYTICS, ATTR_CONNECTION, DOMAIN
+from .entity import NextDnsEntity
 
 PARALLEL_UPDATES = 1
 
@@ -34,7 +34,7 @@ class NextDnsBinarySensorEntityDescription(
     """NextDNS sensor entity description."""
 
 
-class NextDnsBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class NextDnsBinarySensor(NextDnsEntity, BinarySensorEntity):
     """Define an NextDNS binary sensor."""
 
     coordinator: NextDnsConnectionUpdateCoordinator
@@ -42,31 +42,38 @@ class NextDnsBinarySensor(CoordinatorEntity, BinarySensorEntity):
     def __init__(
         self,
         coordinator: NextDnsConnectionUpdateCoordinator,
-        description: BinarySensorEntityDescription,
+        description: NextDnsBinarySensorEntityDescription,
+        profile_id: str,
+        device_info: DeviceInfo,
     ) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_device_info = coordinator.device_info
-        self._attr_unique_id = f"{coordinator.profile_id}_{description.key}"
-        self.entity_description = description
+        """Initialize, the coordinator is shared so the profile is of the entry."""
+        self.profile_id = profile_id
+        super().__init__(coordinator, description)
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{profile_id}_{description.key}"
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = self.coordinator.data.connected
-        self.async_write_ha_state()
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        is_on = self._get_is_on()
+        if is_on == self._attr_is_on:
+            return False
+
+        self._attr_is_on = is_on
+        return True
+
+    def _get_is_on(self) -> bool:
+        """Return the state of the binary sensor."""
+        connected: bool = self.coordinator.data.connected
+        return connected
 
 
 class NextDnsProfileBinarySensor(NextDnsBinarySensor):
     """Define an NextDNS binary sensor."""
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = (
-            self.coordinator.data.profile_id == self.coordinator.profile_id
-        )
-        self.async_write_ha_state()
+    def _get_is_on(self) -> bool:
+        """Return the state of the binary sensor."""
+        return self.coordinator.data.profile_id == self.profile_id
 
 
 SENSORS = (
@@ -93,12 +100,19 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Add a NextDNS entities from a config_entry."""
-    coordinator: NextDnsConnectionUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
-        ATTR_CONNECTION
-    ]
+    coordinators = hass.data[DOMAIN][entry.entry_id]
+    coordinator: NextDnsConnectionUpdateCoordinator = coordinators[ATTR_CONNECTION]
+    profile_coordinator = coordinators[ATTR_ANALYTICS]
 
     sensors: list[NextDnsBinarySensor] = []
     for description in SENSORS:
-        sensors.append(description.entity_class(coordinator, description))
+        sensors.append(
+            description.entity_class(
+                coordinator,
+                description,
+                profile_coordinator.profile_id,
+                profile_coordinator.device_info,
+            )
+        )
 
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
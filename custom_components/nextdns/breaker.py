@@ -0,0 +1,174 @@
+"""Circuit breaker and retries for requests to NextDNS API."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import random
+from typing import Any, TypeVar
+
+from aiohttp import ClientError
+from nextdns import ApiError
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_PROBE_INTERVAL,
+    BREAKER_PROBE_INTERVAL_MAX,
+    FETCH_RETRIES,
+    FETCH_RETRY_DELAY,
+    FETCH_RETRY_DELAY_MAX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ApiError):
+    """Raised when requests are not sent because NextDNS API is unavailable."""
+
+
+class CircuitBreaker:
+    """Class to stop the requests of one API key while NextDNS API is down.
+
+    The breaker opens after BREAKER_FAILURE_THRESHOLD consecutive requests
+    failed and requests fail fast while it is open. Meanwhile a cheap probe is
+    sent at an interval doubled up to BREAKER_PROBE_INTERVAL_MAX and the breaker
+    is half open until the probe completes. A successful probe closes it.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, probe: Callable[[], Awaitable[bool]]
+    ) -> None:
+        """Initialize."""
+        self.loop = loop
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.times_opened = 0
+        self.rejected_requests = 0
+        self.probes = 0
+        self.opened_at: str | None = None
+        self._probe = probe
+        self._probe_interval = float(BREAKER_PROBE_INTERVAL)
+        self._probe_handle: asyncio.TimerHandle | None = None
+        self._probe_task: asyncio.Task[None] | None = None
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if requests may not be sent now."""
+        if self.state == STATE_CLOSED:
+            return
+
+        self.rejected_requests += 1
+        raise CircuitOpenError(f"{self.state}, NextDNS API unavailable")
+
+    def record_success(self) -> None:
+        """Record a request which reached NextDNS API."""
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, open the breaker after too many of them."""
+        self.failures += 1
+        if self.state != STATE_CLOSED or self.failures < BREAKER_FAILURE_THRESHOLD:
+            return
+
+        _LOGGER.warning(
+            "NextDNS API is unavailable, requests are paused until it responds"
+        )
+        self.state = STATE_OPEN
+        self.times_opened += 1
+        self.opened_at = dt_util.utcnow().isoformat()
+        self._probe_interval = float(BREAKER_PROBE_INTERVAL)
+        self._schedule_probe()
+
+    def shutdown(self) -> None:
+        """Cancel the scheduled and running probes."""
+        if self._probe_handle is not None:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the breaker for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "opened_at": self.opened_at,
+            "rejected_requests": self.rejected_requests,
+            "probes": self.probes,
+            "probe_interval": self._probe_interval,
+        }
+
+    def _schedule_probe(self) -> None:
+        """Schedule the next probe."""
+        self._probe_handle = self.loop.call_later(
+            self._probe_interval, self._start_probe
+        )
+
+    def _start_probe(self) -> None:
+        """Start the probe, it is not tracked by Home Assistant."""
+        self._probe_handle = None
+        self._probe_task = self.loop.create_task(self._async_probe())
+
+    async def _async_probe(self) -> None:
+        """Close the breaker if the probe succeeds, probe again later if not."""
+        self.state = STATE_HALF_OPEN
+        self.probes += 1
+        try:
+            available = await self._probe()
+        except (ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.debug("NextDNS API probe failed: %s", err)
+            available = False
+        # The breaker must close or probe again whatever the probe raises
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected error of NextDNS API probe")
+            available = False
+        finally:
+            self._probe_task = None
+
+        if available:
+            _LOGGER.info("NextDNS API is available again")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.opened_at = None
+            return
+
+        self.state = STATE_OPEN
+        self._probe_interval = min(self._probe_interval * 2, BREAKER_PROBE_INTERVAL_MAX)
+        self._schedule_probe()
+
+
+def is_transient(err: BaseException) -> bool:
+    """Return True if the error may not repeat, e.g. a timeout or a server error."""
+    cause = err.__cause__ or err
+    if isinstance(cause, CircuitOpenError):
+        return False
+    if isinstance(cause, ApiError):
+        status = str(cause).split(",", 1)[0]
+        return status.isdigit() and int(status) >= 500
+    return isinstance(cause, (ClientError, asyncio.TimeoutError))
+
+
+async def async_call_with_retry(call: Callable[[], Awaitable[_T]]) -> _T:
+    """Await the call and retry transient errors with jittered exponential backoff."""
+    delay = FETCH_RETRY_DELAY
+    for attempt in range(FETCH_RETRIES):
+        try:
+            return await call()
+        except Exception as err:  # pylint: disable=broad-except
+            if not is_transient(err):
+                raise
+            _LOGGER.debug("Retrying after attempt %s failed: %s", attempt + 1, err)
+
+        await asyncio.sleep(random.uniform(0, delay))
+        delay = min(delay * 2, FETCH_RETRY_DELAY_MAX)
+
+    return await call()
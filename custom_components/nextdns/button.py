@@ -6,10 +6,9 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from . import NextDnsStatusUpdateCoordinator
-from .const import ATTR_STATUS, DOMAIN
+from . import NextDnsAnalyticsUpdateCoordinator
+from .const import ATTR_ANALYTICS, DOMAIN
 
 PARALLEL_UPDATES = 1
 
@@ -24,8 +23,8 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Add aNextDNS entities from a config_entry."""
-    coordinator: NextDnsStatusUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
-        ATTR_STATUS
+    coordinator: NextDnsAnalyticsUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        ATTR_ANALYTICS
     ]
 
     buttons: list[NextDnsButton] = []
@@ -34,16 +33,19 @@ async def async_setup_entry(
     async_add_entities(buttons)
 
 
-class NextDnsButton(CoordinatorEntity[NextDnsStatusUpdateCoordinator], ButtonEntity):
+class NextDnsButton(ButtonEntity):
     """Define an NextDNS button."""
 
+    # The button only uses the API client of the coordinator, it does not
+    # subscribe to its updates, so it does not keep the analytics polling alive.
+
     def __init__(
         self,
-        coordinator: NextDnsStatusUpdateCoordinator,
+        coordinator: NextDnsAnalyticsUpdateCoordinator,
         description: ButtonEntityDescription,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
+        self.coordinator = coordinator
         self._attr_device_info = coordinator.device_info
         self._attr_unique_id = f"{coordinator.profile_id}_{description.key}"
         self._attr_name = description.name.format(profile_name=coordinator.profile_name)
@@ -51,4 +53,4 @@ class NextDnsButton(CoordinatorEntity[NextDnsStatusUpdateCoordinator], ButtonEnt
 
     async def async_press(self) -> None:
         """Trigger cleaning logs."""
-        await self.coordinator.nextdns.clear_logs(self.coordinator.profile_id)
+        await self.coordinator.async_clear_logs()
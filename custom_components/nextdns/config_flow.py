@@ -5,16 +5,29 @@ import asyncio
 from typing import Any
 
 from aiohttp.client_exceptions import ClientConnectorError
-import async_timeout
-from nextdns import ApiError, InvalidApiKeyError, NextDns
+from nextdns import ApiError, InvalidApiKeyError
+from nextdns.model import ProfileInfo
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_API_KEY
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .const import CONF_PROFILE_ID, CONF_PROFILE_NAME, DOMAIN
+import homeassistant.helpers.config_validation as cv
+
+from .account import async_create_account, async_hand_over_account
+from .const import (
+    CONF_IMPORT_STATISTICS,
+    CONF_LOG_STREAM,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PROFILE_ID,
+    CONF_PROFILE_NAME,
+    CONF_PROFILES,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DOMAIN,
+)
 
 
 class NextDnsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -24,8 +37,16 @@ class NextDnsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     def __init__(self) -> None:
         """Initialize the config flow."""
-        self.nextdns: NextDns
         self.api_key: str
+        self.profiles: list[ProfileInfo]
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> NextDnsOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return NextDnsOptionsFlowHandler(config_entry)
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -33,15 +54,11 @@ class NextDnsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle a flow initialized by the user."""
         errors: dict[str, str] = {}
 
-        websession = async_get_clientsession(self.hass)
-
         if user_input is not None:
-            self.api_key = user_input[CONF_API_KEY]
             try:
-                async with async_timeout.timeout(10):
-                    self.nextdns = await NextDns.create(
-                        websession, user_input[CONF_API_KEY]
-                    )
+                account = await async_create_account(
+                    self.hass, user_input[CONF_API_KEY]
+                )
             except InvalidApiKeyError:
                 errors["base"] = "invalid_api_key"
             except (ApiError, ClientConnectorError, asyncio.TimeoutError):
@@ -49,6 +66,11 @@ class NextDnsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             except Exception:  # pylint: disable=broad-except
                 errors["base"] = "unknown"
             else:
+                # The flow keeps only the profiles, so an abandoned flow leaves
+                # no account behind, the account is created at the hand over
+                account.shutdown()
+                self.api_key = account.api_key
+                self.profiles = account.nextdns.profiles
                 return await self.async_step_profiles()
 
         return self.async_show_form(
@@ -60,28 +82,119 @@ class NextDnsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_profiles(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the profiles step."""
+        """Handle the profiles step, several profiles can be chosen at once."""
         errors: dict[str, str] = {}
 
+        configured = self._async_current_ids()
+        profiles = {
+            profile.id: profile.name
+            for profile in self.profiles
+            if profile.id not in configured
+        }
+        if not profiles:
+            return self.async_abort(reason="already_configured")
+
         if user_input is not None:
-            profile_name = user_input[CONF_PROFILE_NAME]
-            profile_id = self.nextdns.get_profile_id(profile_name)
+            if profile_ids := user_input[CONF_PROFILES]:
+                # The entries are set up with the client of this flow
+                async_hand_over_account(self.hass, self.api_key, self.profiles)
+
+                for profile_id in profile_ids[1:]:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={"source": config_entries.SOURCE_IMPORT},
+                            data={
+                                CONF_PROFILE_ID: profile_id,
+                                CONF_PROFILE_NAME: profiles[profile_id],
+                                CONF_API_KEY: self.api_key,
+                            },
+                        )
+                    )
+
+                await self.async_set_unique_id(profile_ids[0])
+                self._abort_if_unique_id_configured()
 
-            await self.async_set_unique_id(profile_id)
-            self._abort_if_unique_id_configured()
+                return self.async_create_entry(
+                    title=profiles[profile_ids[0]],
+                    data={
+                        CONF_PROFILE_ID: profile_ids[0],
+                        CONF_API_KEY: self.api_key,
+                    },
+                )
 
-            return self.async_create_entry(
-                title=profile_name,
-                data={CONF_PROFILE_ID: profile_id, CONF_API_KEY: self.api_key},
-            )
+            errors["base"] = "no_profiles"
 
         return self.async_show_form(
             step_id="profiles",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_PROFILES): cv.multi_select(profiles)}
+            ),
+            errors=errors,
+        )
+
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        """Create an entry for a profile chosen with other profiles in one flow."""
+        await self.async_set_unique_id(import_data[CONF_PROFILE_ID])
+        self._abort_if_unique_id_configured()
+
+        return self.async_create_entry(
+            title=import_data[CONF_PROFILE_NAME],
+            data={
+                CONF_PROFILE_ID: import_data[CONF_PROFILE_ID],
+                CONF_API_KEY: import_data[CONF_API_KEY],
+            },
+        )
+
+
+class NextDnsOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for NextDNS."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize NextDNS options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if (
+                user_input[CONF_MAX_UPDATE_INTERVAL]
+                < user_input[CONF_MIN_UPDATE_INTERVAL]
+            ):
+                errors["base"] = "invalid_update_interval"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+
+        return self.async_show_form(
+            step_id="init",
             data_schema=vol.Schema(
                 {
-                    vol.Required(CONF_PROFILE_NAME): vol.In(
-                        [profile.name for profile in self.nextdns.profiles]
-                    )
+                    vol.Required(
+                        CONF_MIN_UPDATE_INTERVAL,
+                        default=options.get(
+                            CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_MAX_UPDATE_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_IMPORT_STATISTICS,
+                        default=options.get(CONF_IMPORT_STATISTICS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_LOG_STREAM,
+                        default=options.get(CONF_LOG_STREAM, False),
+                    ): bool,
                 }
             ),
             errors=errors,
@@ -1,19 +1,143 @@
 """Constants for NextDNS integration."""
 from datetime import timedelta
 
+ATTR_ACCOUNTS = "accounts"
+ATTR_ALLOWLIST = "allowlist"
+ATTR_ACCOUNTS_LOCKS = "accounts_locks"
+ATTR_ANALYTICS = "analytics"
 ATTR_CONNECTION = "connection"
+ATTR_DENYLIST = "denylist"
 ATTR_DNSSEC = "dnssec"
 ATTR_ENCRYPTION = "encryption"
 ATTR_IP_VERSIONS = "ip_versions"
+ATTR_LAST_SYNC = "last_sync"
+ATTR_LISTS = "lists"
+ATTR_LOG_STREAM = "log_stream"
+ATTR_PROFILES = "profiles"
 ATTR_PROTOCOLS = "protocols"
+ATTR_RANKING = "ranking"
+ATTR_RATES = "rates"
 ATTR_SETTINGS = "settings"
+ATTR_STALE = "stale"
 ATTR_STATUS = "status"
+ATTR_TOP = "top"
+ATTR_TOP_BLOCKED_DOMAINS = "top_blocked_domains"
+ATTR_TOP_DOMAINS = "top_domains"
+ATTR_TOP_REASONS = "top_reasons"
 
+CONF_ENTRY_IDS = "entry_ids"
+CONF_IMPORT_STATISTICS = "import_statistics"
+CONF_LOG_STREAM = "log_stream"
+CONF_MAX_UPDATE_INTERVAL = "max_update_interval"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
 CONF_PROFILE_ID = "profile_id"
 CONF_PROFILE_NAME = "profile_name"
+CONF_PROFILES = "profiles"
+
+# Bounds of the adaptive update intervals, in minutes
+DEFAULT_MAX_UPDATE_INTERVAL = 30
+DEFAULT_MIN_UPDATE_INTERVAL = 1
+
+# Time in seconds the client of a config flow waits for the entries setup
+ACCOUNT_HAND_OVER_TIMEOUT = 60
+
+# Budget of requests to NextDNS API for one API key, per minute and in a burst
+API_RATE_LIMIT = 120
+API_RATE_LIMIT_BURST = 40
+MAX_RATE_LIMITED_RETRIES = 2
+
+# Timeout of one HTTP exchange with NextDNS API, waiting for the budget excluded
+REQUEST_TIMEOUT = 10
+
+# Requests to NextDNS API in flight at once for one API key
+MAX_CONCURRENT_REQUESTS = 4
+
+# Retries of transient fetch errors and their backoff delays, in seconds
+FETCH_RETRIES = 2
+FETCH_RETRY_DELAY = 1
+FETCH_RETRY_DELAY_MAX = 10
+
+# Consecutive failed requests of one API key which open the circuit breaker,
+# and the intervals, in seconds, of the probes sent while it is open
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_PROBE_INTERVAL = 30
+BREAKER_PROBE_INTERVAL_MAX = 600
+BREAKER_PROBE_TIMEOUT = 10
+
+# Priorities of requests to NextDNS API, lower value is sent first
+PRIORITY_WRITE = 0
+PRIORITY_SETTINGS = 1
+PRIORITY_ANALYTICS = 2
+
+# Settings changes made within this time, in seconds, are written together
+SETTINGS_WRITE_DELAY = 0.3
+# Delay, in seconds, of the refresh which verifies settings changes
+SETTINGS_VERIFY_DELAY = 5
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Analytics time series imported into long-term statistics: bucket length in
+# seconds, how often they are fetched and how far back a first import reaches
+STATISTICS_BUCKET = 3600
+STATISTICS_IMPORT_INTERVAL = timedelta(hours=6)
+STATISTICS_BACKFILL = timedelta(days=7)
+
+# Number of analytics samples kept in memory for each profile
+HISTORY_SIZE = 288
+
+# Age in seconds after which the cached denylist or allowlist is fetched again
+# before a sync, and the number of domain changes sent at once by a sync
+LIST_CACHE_TTL = 600
+LIST_SYNC_BATCH = 10
+
+# Number of entries in the top lists
+TOP_LIST_SIZE = 10
+
+EVENT_BLOCKED_QUERY = "nextdns_blocked_query"
+EVENT_LIST_SYNCED = "nextdns_list_synced"
+EVENT_LOGS_CLEARED = "nextdns_logs_cleared"
+EVENT_SETTINGS_APPLIED = "nextdns_settings_applied"
+
+SERVICE_APPLY_SETTINGS = "apply_settings"
+SERVICE_CLEAR_LOGS = "clear_logs"
+SERVICE_SYNC_LIST = "sync_list"
+
+# Profiles of one API key handled at once by the services, also the number of
+# coordinators refreshed together after the logs are cleared
+SERVICE_CONCURRENCY = 4
+
+# Dispatched when a coordinator notifies its entities
+SIGNAL_UPDATED = "nextdns_updated"
+# Delay, in seconds, over which updates are merged into one WebSocket message
+SNAPSHOT_UPDATE_DELAY = 1
+
+# Number of recent queries kept from the log stream
+LOG_STREAM_BUFFER_SIZE = 500
+# Blocked query events fired per second and in a burst, the rest are dropped
+LOG_STREAM_EVENTS_RATE = 1
+LOG_STREAM_EVENTS_BURST = 20
+# Log stream lines handled before yielding to the event loop
+LOG_STREAM_BATCH = 100
+# Reconnect delays in seconds and the timeout for reading the log stream
+LOG_STREAM_RETRY_MIN = 1
+LOG_STREAM_RETRY_MAX = 300
+LOG_STREAM_READ_TIMEOUT = 300
+# Seconds a connection must stay up to reset the reconnect delay
+LOG_STREAM_STABLE_TIME = 60
+
+# Upper bound in seconds of the random delay added to scheduled refreshes, at
+# most this share of the update interval
+SCHEDULE_JITTER = 10
+SCHEDULE_JITTER_SHARE = 0.05
+# Window in seconds over which refreshes of restored data are spread at startup
+STARTUP_REFRESH_SPREAD = 30
 
 UPDATE_INTERVAL_ANALYTICS = timedelta(minutes=10)
 UPDATE_INTERVAL_CONNECTION = timedelta(minutes=1)
 UPDATE_INTERVAL_SETTINGS = timedelta(minutes=1)
 
+STORAGE_SAVE_DELAY = 60
+STORAGE_VERSION = 1
+
 DOMAIN = "nextdns"
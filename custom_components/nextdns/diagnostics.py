@@ -2,23 +2,29 @@
 from __future__ import annotations
 
 from dataclasses import asdict
+from typing import Any
+
+from nextdns.model import NextDnsData
 
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY
 from homeassistant.core import HomeAssistant
 
+from .account import NextDnsAccount
 from .const import (
+    ATTR_ACCOUNTS,
+    ATTR_ANALYTICS,
     ATTR_CONNECTION,
-    ATTR_DNSSEC,
-    ATTR_ENCRYPTION,
-    ATTR_IP_VERSIONS,
-    ATTR_PROTOCOLS,
+    ATTR_LISTS,
+    ATTR_LOG_STREAM,
     ATTR_SETTINGS,
-    ATTR_STATUS,
+    ATTR_TOP,
     CONF_PROFILE_ID,
     DOMAIN,
 )
+from .lists import DomainLists
+from .ranking import TopLists
 
 TO_REDACT = {CONF_API_KEY, CONF_PROFILE_ID}
 
@@ -28,26 +34,54 @@ async def async_get_config_entry_diagnostics(
 ) -> dict:
     """Return diagnostics for a config entry."""
     coordinators = hass.data[DOMAIN][config_entry.entry_id]
+    account: NextDnsAccount = hass.data[DOMAIN][ATTR_ACCOUNTS][
+        config_entry.data[CONF_API_KEY]
+    ]
+    profile_id = config_entry.data[CONF_PROFILE_ID]
 
+    analytics_coordinator = coordinators[ATTR_ANALYTICS]
     connection_coordinator = coordinators[ATTR_CONNECTION]
-    dnssec_coordinator = coordinators[ATTR_DNSSEC]
-    encryption_coordinator = coordinators[ATTR_ENCRYPTION]
-    ip_versions_coordinator = coordinators[ATTR_IP_VERSIONS]
     settings_coordinator = coordinators[ATTR_SETTINGS]
-    protocols_coordinator = coordinators[ATTR_PROTOCOLS]
-    status_coordinator = coordinators[ATTR_STATUS]
+    top_coordinator = coordinators[ATTR_TOP]
+    lists_coordinator = coordinators[ATTR_LISTS]
 
     diagnostics_data = {
         "config_entry_data": async_redact_data(config_entry.data, TO_REDACT),
+        "analytics_coordinator_data": _asdict(analytics_coordinator.data),
+        "analytics_history": analytics_coordinator.history.as_dict(),
         "connection_coordinator_data": async_redact_data(
-            asdict(connection_coordinator.data), TO_REDACT
+            _asdict(connection_coordinator.data), TO_REDACT
         ),
-        "dnssec_coordinator_data": asdict(dnssec_coordinator.data),
-        "encryption_coordinator_data": asdict(encryption_coordinator.data),
-        "ip_versions_coordinator_data": asdict(ip_versions_coordinator.data),
-        "protocols_coordinator_data": asdict(protocols_coordinator.data),
-        "settings_coordinator_data": asdict(settings_coordinator.data),
-        "status_coordinator_data": asdict(status_coordinator.data),
+        "settings_coordinator_data": _asdict(settings_coordinator.data),
+        "top_coordinator_data": _asdict(top_coordinator.data),
+        "lists_coordinator_data": {
+            key: len(value) if isinstance(value, list) else value
+            for key, value in _asdict(lists_coordinator.data).items()
+        },
+        "update_counters": {
+            ATTR_ANALYTICS: asdict(analytics_coordinator.counters),
+            ATTR_CONNECTION: asdict(connection_coordinator.counters),
+            ATTR_LISTS: asdict(lists_coordinator.counters),
+            ATTR_SETTINGS: asdict(settings_coordinator.counters),
+            ATTR_TOP: asdict(top_coordinator.counters),
+        },
+        "circuit_breaker": account.breaker.as_dict(),
+        "request_metrics": {
+            endpoint: metrics.as_dict()
+            for endpoint, metrics in account.metrics.for_profile(profile_id).items()
+        },
     }
 
+    if (log_stream := coordinators.get(ATTR_LOG_STREAM)) is not None:
+        diagnostics_data["log_stream"] = {
+            "connected": log_stream.connected,
+            "buffered_queries": len(log_stream.queries),
+            **asdict(log_stream.counters),
+        }
+
     return diagnostics_data
+
+
+def _asdict(data: NextDnsData | DomainLists | TopLists | None) -> dict[str, Any]:
+    """Return coordinator data as dict, coordinators without entities have none."""
+    return asdict(data) if data is not None else {}
@@ -0,0 +1,68 @@
+"""Base entity for the NextDNS integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import NextDnsUpdateCoordinator
+from .const import ATTR_STALE
+
+
+class NextDnsEntity(CoordinatorEntity):
+    """Define an NextDNS entity."""
+
+    coordinator: NextDnsUpdateCoordinator
+
+    def __init__(
+        self,
+        coordinator: NextDnsUpdateCoordinator,
+        description: EntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        self._attr_device_info = coordinator.device_info
+        self._attr_unique_id = f"{coordinator.profile_id}_{description.key}"
+        self.entity_description = description
+        self._written_status: tuple[bool, bool] | None = None
+        if coordinator.data is not None:
+            self._async_update_attrs()
+
+    @property
+    def data_key(self) -> str:
+        """Return the key of the coordinator data used by the entity."""
+        return self.entity_description.key
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the state attributes, mark restored values as stale."""
+        if self.coordinator.stale:
+            return {ATTR_STALE: True}
+        return None
+
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        await super().async_added_to_hass()
+        self.coordinator.async_enable_key(self.data_key)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        # A coordinator started on demand has no data if its first refresh failed
+        changed = self.coordinator.data is not None and self._async_update_attrs()
+        status = (self.available, self.coordinator.stale)
+
+        if not changed and status == self._written_status:
+            self.coordinator.counters.states_skipped += 1
+            return
+
+        self._written_status = status
+        self.coordinator.counters.states_written += 1
+        self.async_write_ha_state()
+
+    @callback
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        raise NotImplementedError
@@ -0,0 +1,44 @@
+"""Denylist and allowlist of NextDNS profiles."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .const import ATTR_ALLOWLIST, ATTR_DENYLIST
+
+LIST_TYPES = (ATTR_DENYLIST, ATTR_ALLOWLIST)
+
+
+@dataclass
+class DomainLists:
+    """Domains of the denylist and the allowlist and the time of the last sync."""
+
+    denylist: list[str] = field(default_factory=list)
+    allowlist: list[str] = field(default_factory=list)
+    last_sync: str | None = None
+
+
+def normalize_domains(domains: Iterable[str]) -> set[str]:
+    """Return the domains in the form used by NextDNS API."""
+    return {
+        domain.strip().strip(".").lower() for domain in domains if domain.strip(" .")
+    }
+
+
+def parse_domains(text: str) -> list[str]:
+    """Return the domains of a list with one domain in a line.
+
+    Comments after # are left out and for lines in the hosts file format the
+    last field is the domain.
+    """
+    domains = []
+    for line in text.splitlines():
+        if fields := line.split("#", 1)[0].split():
+            domains.append(fields[-1])
+    return domains
+
+
+def read_domains_file(path: str) -> list[str]:
+    """Read the domains from the file, run in the executor."""
+    return parse_domains(Path(path).read_text(encoding="utf-8"))
@@ -0,0 +1,249 @@
+"""Consumer of the NextDNS query log stream."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from http import HTTPStatus
+import json
+import logging
+from typing import Any
+
+from aiohttp import ClientError, ClientTimeout
+from nextdns import ApiError, InvalidApiKeyError, NextDns
+from nextdns.const import API_ENDPOINT
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .const import (
+    EVENT_BLOCKED_QUERY,
+    LOG_STREAM_BATCH,
+    LOG_STREAM_BUFFER_SIZE,
+    LOG_STREAM_EVENTS_BURST,
+    LOG_STREAM_EVENTS_RATE,
+    LOG_STREAM_READ_TIMEOUT,
+    LOG_STREAM_RETRY_MAX,
+    LOG_STREAM_RETRY_MIN,
+    LOG_STREAM_STABLE_TIME,
+    PRIORITY_ANALYTICS,
+)
+from .scheduler import request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class LogStreamCounters:
+    """Counters of the log stream."""
+
+    connects: int = 0
+    queries: int = 0
+    events_fired: int = 0
+    events_dropped: int = 0
+
+
+class NextDnsLogStream:
+    """Class to consume the query log stream of a profile.
+
+    Recent queries are kept in a ring buffer of fixed size and blocked queries
+    are fired as events at a limited rate, the events over the limit are
+    dropped. The stream is read only as fast as it is handled, so a burst of
+    queries is held back by the connection instead of the memory.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, nextdns: NextDns, profile_id: str, profile_name: str
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.nextdns = nextdns
+        self.profile_id = profile_id
+        self.profile_name = profile_name
+        self.queries: deque[dict[str, Any]] = deque(maxlen=LOG_STREAM_BUFFER_SIZE)
+        self.counters = LogStreamCounters()
+        self.connected = False
+        self.last_id: str | None = None
+        self._tokens = float(LOG_STREAM_EVENTS_BURST)
+        self._tokens_updated = hass.loop.time()
+        self._task: asyncio.Task[None] | None = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+        self._connected_since: float | None = None
+        self._query_listeners: list[Callable[[dict[str, Any]], None]] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Start consuming the log stream."""
+        # Not tracked by Home Assistant, the stream does not end on its own, so
+        # it is cancelled when the entry is unloaded or Home Assistant stops
+        if self._task is None:
+            self._task = self.hass.loop.create_task(self._async_run())
+            self._unsub_stop = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+            )
+
+    @callback
+    def async_add_query_listener(
+        self, listener: Callable[[dict[str, Any]], None]
+    ) -> CALLBACK_TYPE:
+        """Call the listener with every received query."""
+        self._query_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the query listener."""
+            self._query_listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop consuming the log stream."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+
+    @callback
+    def _async_handle_stop(self, _event: Event) -> None:
+        """Stop consuming the log stream when Home Assistant stops."""
+        self._unsub_stop = None
+        self.async_stop()
+
+    async def _async_run(self) -> None:
+        """Consume the stream, reconnect with backoff and resume after the last id."""
+        delay = LOG_STREAM_RETRY_MIN
+        while True:
+            queries = self.counters.queries
+            self._connected_since = None
+            try:
+                await self._async_consume()
+            except (
+                ApiError,
+                ClientError,
+                InvalidApiKeyError,
+                asyncio.TimeoutError,
+            ) as err:
+                _LOGGER.debug("Log stream of %s failed: %s", self.profile_id, err)
+            # The stream must reconnect whatever goes wrong with one connection
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Unexpected error in log stream of %s", self.profile_id
+                )
+            finally:
+                self.connected = False
+
+            # Back off until a connection delivers queries or stays up, a server
+            # closing every connection at once is not reconnected at once
+            since = self._connected_since
+            if self.counters.queries != queries or (
+                since is not None
+                and self.hass.loop.time() - since >= LOG_STREAM_STABLE_TIME
+            ):
+                delay = LOG_STREAM_RETRY_MIN
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOG_STREAM_RETRY_MAX)
+
+    async def _async_consume(self) -> None:
+        """Read the server-sent events of the log stream."""
+        url = f"{API_ENDPOINT}/profiles/{self.profile_id}/logs/stream"
+        if self.last_id is not None:
+            url = f"{url}?id={self.last_id}"
+
+        # pylint: disable=protected-access
+        with request_priority(PRIORITY_ANALYTICS):
+            resp = await self.nextdns._session.request(
+                "get",
+                url,
+                headers=self.nextdns._headers,
+                timeout=ClientTimeout(total=None, sock_read=LOG_STREAM_READ_TIMEOUT),
+            )
+
+        try:
+            if resp.status == HTTPStatus.FORBIDDEN.value:
+                raise InvalidApiKeyError
+            if resp.status != HTTPStatus.OK.value:
+                raise ApiError(f"{resp.status}, log stream unavailable")
+
+            self.connected = True
+            self._connected_since = self.hass.loop.time()
+            self.counters.connects += 1
+            event_id: str | None = None
+            data: list[str] = []
+            lines = 0
+
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                if line.startswith("id:"):
+                    event_id = line[3:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    self._handle_query(event_id, "\n".join(data))
+                    event_id, data = None, []
+
+                # Do not hold the event loop while a burst is buffered
+                lines += 1
+                if lines % LOG_STREAM_BATCH == 0:
+                    await asyncio.sleep(0)
+        finally:
+            resp.release()
+
+    @callback
+    def _handle_query(self, event_id: str | None, data: str) -> None:
+        """Store the query and fire an event if it was blocked."""
+        try:
+            query = json.loads(data)
+        except ValueError:
+            _LOGGER.debug("Invalid log stream data: %s", data)
+            return
+        if not isinstance(query, dict):
+            _LOGGER.debug("Unexpected log stream data: %s", data)
+            return
+
+        if event_id:
+            self.last_id = event_id
+        self.queries.append(query)
+        self.counters.queries += 1
+        for listener in self._query_listeners:
+            listener(query)
+
+        if query.get("status") != "blocked":
+            return
+
+        if not self._take_event_token():
+            self.counters.events_dropped += 1
+            return
+
+        self.counters.events_fired += 1
+        self.hass.bus.async_fire(
+            EVENT_BLOCKED_QUERY,
+            {
+                "profile_id": self.profile_id,
+                "profile_name": self.profile_name,
+                "domain": query.get("domain"),
+                "root": query.get("root"),
+                "reasons": [
+                    reason.get("name") for reason in query.get("reasons") or []
+                ],
+                "device": (query.get("device") or {}).get("name"),
+                "client_ip": query.get("clientIp"),
+                "timestamp": query.get("timestamp"),
+            },
+        )
+
+    def _take_event_token(self) -> bool:
+        """Return True if an event may be fired now."""
+        now = self.hass.loop.time()
+        self._tokens = min(
+            LOG_STREAM_EVENTS_BURST,
+            self._tokens + (now - self._tokens_updated) * LOG_STREAM_EVENTS_RATE,
+        )
+        self._tokens_updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
@@ -0,0 +1,143 @@
+"""Latency and error metrics of requests to NextDNS."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+import re
+from typing import Any
+
+from nextdns.const import API_ENDPOINT
+
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_ALLOWLIST, ATTR_DENYLIST, LATENCY_BUCKETS
+
+ACCOUNT = "account"
+TEST_DOMAIN = ".test.nextdns.io"
+
+_PROFILE_PATH = re.compile(r"^/profiles/([^/?]+)")
+# Items of the lists are in the path when they are removed
+_LIST_ITEM = re.compile(rf"^/({ATTR_ALLOWLIST}|{ATTR_DENYLIST})/[^/]+")
+
+
+@dataclass
+class EndpointMetrics:
+    """Metrics of the requests to one endpoint for one profile."""
+
+    requests: int = 0
+    timeouts: int = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    latency_sum: float = 0.0
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    last_success: datetime | None = None
+
+    def record(self, latency: float, error: str | None = None) -> None:
+        """Record a request which got a response or failed with an error."""
+        self._record_latency(latency)
+        if error is None:
+            self.last_success = dt_util.utcnow()
+        else:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def record_timeout(self, latency: float) -> None:
+        """Record a request which was cancelled or timed out."""
+        self._record_latency(latency)
+        self.timeouts += 1
+
+    def merge(self, other: EndpointMetrics) -> None:
+        """Add the metrics of another endpoint or profile."""
+        self.requests += other.requests
+        self.timeouts += other.timeouts
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        self.latency_sum += other.latency_sum
+        for index, count in enumerate(other.latency_buckets):
+            self.latency_buckets[index] += count
+        if other.last_success is not None and (
+            self.last_success is None or other.last_success > self.last_success
+        ):
+            self.last_success = other.last_success
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket with the latency percentile.
+
+        None means that the latency is above the largest bucket.
+        """
+        target = self.requests * percent / 100
+        seen = 0
+        for index, count in enumerate(self.latency_buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else None
+        return 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as dict."""
+        labels = [f"<= {bound}" for bound in LATENCY_BUCKETS]
+        labels.append(f"> {LATENCY_BUCKETS[-1]}")
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": dict(self.errors),
+            "latency_mean": (
+                round(self.latency_sum / self.requests, 3) if self.requests else None
+            ),
+            "latency_histogram": dict(zip(labels, self.latency_buckets)),
+            "last_success": (
+                self.last_success.isoformat() if self.last_success else None
+            ),
+        }
+
+    def _record_latency(self, latency: float) -> None:
+        """Add the latency of a request to the histogram."""
+        self.requests += 1
+        self.latency_sum += latency
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+
+class RequestMetrics:
+    """Class to aggregate request metrics per profile and endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.profiles: dict[str, dict[str, EndpointMetrics]] = {}
+
+    def endpoint(self, method: str, url: str) -> EndpointMetrics:
+        """Return the metrics for the request.
+
+        Profile IDs and list items are left out of the endpoint names, so the
+        number of endpoints does not grow with the domains changed.
+        """
+        profile, name = _split_url(url)
+        endpoints = self.profiles.setdefault(profile, {})
+        return endpoints.setdefault(f"{method.upper()} {name}", EndpointMetrics())
+
+    def for_profile(self, profile: str) -> dict[str, EndpointMetrics]:
+        """Return the metrics of the endpoints for the profile."""
+        return self.profiles.get(profile, {})
+
+    def per_endpoint(self) -> dict[str, EndpointMetrics]:
+        """Return the metrics of the endpoints summed over all profiles."""
+        totals: dict[str, EndpointMetrics] = {}
+        for endpoints in self.profiles.values():
+            for name, metrics in endpoints.items():
+                totals.setdefault(name, EndpointMetrics()).merge(metrics)
+        return totals
+
+
+def _split_url(url: str) -> tuple[str, str]:
+    """Return the profile and the endpoint name of the URL."""
+    if url.startswith(API_ENDPOINT):
+        path = url[len(API_ENDPOINT) :].split("?", 1)[0]
+        if match := _PROFILE_PATH.match(path):
+            rest = _LIST_ITEM.sub(r"/\1/{item}", path[match.end() :])
+            return match.group(1), "/profiles/{profile}" + rest
+        return ACCOUNT, path
+
+    host = url.split("://", 1)[-1].split("/", 1)[0]
+    if host.endswith(TEST_DOMAIN):
+        return host[: -len(TEST_DOMAIN)], "connection test"
+    return ACCOUNT, host
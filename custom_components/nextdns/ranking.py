@@ -0,0 +1,58 @@
+"""Ranked lists of NextDNS top domains and block reasons."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TopLists:
+    """Top lists fetched from NextDNS API as [name, queries] pairs."""
+
+    top_domains: list[list[str | int]] = field(default_factory=list)
+    top_blocked_domains: list[list[str | int]] = field(default_factory=list)
+    top_reasons: list[list[str | int]] = field(default_factory=list)
+
+
+class Ranking:
+    """Class to keep the top names by the number of queries in order.
+
+    The ranking is replaced with every fetched list and between the fetches
+    the queries from the log stream are counted into it. A counted name moves
+    up only by swaps with its neighbours, so the ranking is not sorted again.
+    Names outside of the ranking are not counted, their total is unknown.
+    """
+
+    __slots__ = ("names", "counts")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.names: list[str] = []
+        self.counts: dict[str, int] = {}
+
+    def replace(self, items: Iterable[list[str | int]]) -> bool:
+        """Replace the ranking with a fetched list, return True if it changed."""
+        names = []
+        counts = {}
+        for name, queries in items:
+            names.append(str(name))
+            counts[str(name)] = int(queries)
+
+        changed = names != self.names
+        self.names = names
+        self.counts = counts
+        return changed
+
+    def count(self, name: str | None) -> bool:
+        """Count a query of the name, return True if the ranking changed."""
+        if name not in self.counts:
+            return False
+
+        self.counts[name] += 1
+        index = self.names.index(name)
+        moved = False
+        while index and self.counts[self.names[index - 1]] < self.counts[name]:
+            self.names[index - 1], self.names[index] = name, self.names[index - 1]
+            index -= 1
+            moved = True
+        return moved
@@ -0,0 +1,66 @@
+"""Rates of NextDNS counters derived from consecutive snapshots."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CounterRate:
+    """Change of a counter between two snapshots and its rate per minute."""
+
+    delta: int | None = None
+    rate: float | None = None
+
+
+class SnapshotRates:
+    """Class to derive deltas and rates from consecutive counter snapshots.
+
+    The counters are totals over a sliding window, so they drop when logs are
+    cleared and when old queries leave the window. After a reset marked by the
+    clear logs button the counters start from zero and the new value is the
+    delta. Any other drop cannot be split into new and expired queries, so the
+    delta is unknown until the next snapshot. The delta is the net change of
+    the window, so while queries leave the window it is lower than the number
+    of new queries, the API does not tell how many left.
+    """
+
+    __slots__ = ("keys", "values", "_previous", "_previous_time", "_reset")
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        """Initialize."""
+        self.keys = tuple(keys)
+        self.values: dict[str, CounterRate] = {key: CounterRate() for key in self.keys}
+        self._previous: dict[str, int] | None = None
+        self._previous_time = 0.0
+        self._reset = False
+
+    def mark_reset(self) -> None:
+        """Mark that the counters were reset, e.g. by clearing the logs."""
+        self._reset = True
+
+    def update(self, snapshot: dict[str, int], now: float) -> None:
+        """Derive the deltas and rates from a new snapshot taken at the time."""
+        previous, elapsed = self._previous, now - self._previous_time
+        self._previous, self._previous_time = snapshot, now
+
+        # A reset before the first snapshot is already included in it
+        if previous is None:
+            self._reset = False
+            return
+
+        for key in self.keys:
+            current = snapshot[key]
+            if self._reset:
+                delta: int | None = current
+            elif current < previous[key]:
+                delta = None
+            else:
+                delta = current - previous[key]
+
+            rate = None
+            if delta is not None and elapsed > 0:
+                rate = round(delta / elapsed * 60, 2)
+            self.values[key] = CounterRate(delta, rate)
+
+        self._reset = False
@@ -0,0 +1,240 @@
+"""Request scheduler shared by all requests made with one NextDNS API key."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+import heapq
+from http import HTTPStatus
+import itertools
+import logging
+from typing import Any
+
+from aiohttp import ClientError, ClientResponse, ClientSession, ClientTimeout
+from nextdns import ApiError
+from nextdns.const import API_ENDPOINT
+
+from homeassistant.util import dt as dt_util
+
+from .breaker import CircuitBreaker
+from .const import (
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_BURST,
+    BREAKER_PROBE_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_RATE_LIMITED_RETRIES,
+    PRIORITY_SETTINGS,
+    REQUEST_TIMEOUT,
+)
+from .metrics import EndpointMetrics, RequestMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+_REQUEST_PRIORITY: ContextVar[int] = ContextVar(
+    "nextdns_request_priority", default=PRIORITY_SETTINGS
+)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Set the priority of the API requests made within the context."""
+    token = _REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+class RequestScheduler:
+    """Class to budget API requests with a token bucket and priority classes.
+
+    Tokens are refilled at API_RATE_LIMIT per minute up to API_RATE_LIMIT_BURST.
+    When no token is available, requests wait and are released by priority, lower
+    value first, and in the order of arrival within the same priority.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize."""
+        self.loop = loop
+        self.rate = API_RATE_LIMIT / 60
+        self.burst = API_RATE_LIMIT_BURST
+        self.tokens = float(self.burst)
+        self.throttled_until = 0.0
+        self._updated = loop.time()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    async def async_acquire(self, priority: int) -> None:
+        """Wait until a request with the priority may be sent."""
+        self._refill()
+        if not self._waiters and self._can_send():
+            self.tokens -= 1
+            return
+
+        future: asyncio.Future[None] = self.loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._schedule_wakeup()
+        await future
+
+    def throttle(self, retry_after: float) -> None:
+        """Stop sending requests for retry_after seconds."""
+        self.throttled_until = max(self.throttled_until, self.loop.time() + retry_after)
+        self.tokens = 0
+        _LOGGER.debug("Rate limited by NextDNS API for %s seconds", retry_after)
+
+    def shutdown(self) -> None:
+        """Cancel the wakeup timer and all waiting requests."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+    def _can_send(self) -> bool:
+        """Return True if a token is available and the API is not throttled."""
+        return self.tokens >= 1 and self.loop.time() >= self.throttled_until
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last refill."""
+        now = self.loop.time()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _release(self) -> None:
+        """Release waiting requests for the available tokens."""
+        self._wakeup = None
+        self._refill()
+
+        while self._waiters and self._can_send():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        """Schedule releasing waiters when the next token becomes available."""
+        if self._wakeup is not None or not self._waiters:
+            return
+
+        now = self.loop.time()
+        when = max(now + max(0.0, 1 - self.tokens) / self.rate, self.throttled_until)
+        self._wakeup = self.loop.call_at(when, self._release)
+
+
+class ScheduledSession:
+    """Class to send the requests of the NextDNS library through the scheduler.
+
+    At most MAX_CONCURRENT_REQUESTS requests of one API key are in flight and
+    no requests are sent while the circuit breaker of the API key is open. The
+    timeout of REQUEST_TIMEOUT seconds applies to each HTTP exchange, the time
+    spent waiting for the budget or a rate limit does not count.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        scheduler: RequestScheduler,
+        metrics: RequestMetrics,
+    ) -> None:
+        """Initialize."""
+        self._session = session
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.breaker = CircuitBreaker(scheduler.loop, self._async_probe)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> ClientResponse:
+        """Make an HTTP request within the request budget of the API key."""
+        metrics = self.metrics.endpoint(method, url)
+        kwargs.setdefault("timeout", ClientTimeout(total=REQUEST_TIMEOUT))
+
+        # The connection test does not use the NextDNS API and its budget
+        if not url.startswith(API_ENDPOINT):
+            return await self._measured_request(metrics, method, url, **kwargs)
+
+        priority = _REQUEST_PRIORITY.get()
+
+        for _ in range(MAX_RATE_LIMITED_RETRIES + 1):
+            self.breaker.check()
+            await self.scheduler.async_acquire(priority)
+            # Requests hold a slot until the response headers are received, so
+            # long-lived streams do not block the other requests
+            async with self._semaphore:
+                try:
+                    resp = await self._measured_request(metrics, method, url, **kwargs)
+                # A cancelled request says nothing about the state of the API
+                except (asyncio.TimeoutError, ClientError):
+                    self.breaker.record_failure()
+                    raise
+
+            if resp.status >= HTTPStatus.INTERNAL_SERVER_ERROR.value:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if resp.status != HTTPStatus.TOO_MANY_REQUESTS.value:
+                return resp
+
+            self.scheduler.throttle(_retry_after(resp))
+            resp.release()
+
+        raise ApiError(f"{HTTPStatus.TOO_MANY_REQUESTS.value}, rate limit exceeded")
+
+    async def _async_probe(self) -> bool:
+        """Return True if NextDNS API responds, any response without a server error.
+
+        The probe requests the API root, so it needs neither the API key nor a
+        token of the request budget.
+        """
+        url = f"{API_ENDPOINT}/"
+        metrics = self.metrics.endpoint("get", url)
+        resp = await self._measured_request(
+            metrics, "get", url, timeout=ClientTimeout(total=BREAKER_PROBE_TIMEOUT)
+        )
+        resp.release()
+        return resp.status < HTTPStatus.INTERNAL_SERVER_ERROR.value
+
+    async def _measured_request(
+        self, metrics: EndpointMetrics, method: str, url: str, **kwargs: Any
+    ) -> ClientResponse:
+        """Make an HTTP request and record its latency until the response headers."""
+        start = self.scheduler.loop.time()
+        try:
+            resp = await self._session.request(method, url, **kwargs)
+        except asyncio.TimeoutError:
+            metrics.record_timeout(self.scheduler.loop.time() - start)
+            raise
+        except ClientError as err:
+            metrics.record(self.scheduler.loop.time() - start, type(err).__name__)
+            raise
+
+        latency = self.scheduler.loop.time() - start
+        if resp.status >= HTTPStatus.BAD_REQUEST.value:
+            metrics.record(latency, str(resp.status))
+        else:
+            metrics.record(latency)
+        return resp
+
+
+def _retry_after(resp: ClientResponse) -> float:
+    """Return the delay in seconds from the Retry-After header of the response."""
+    value = resp.headers.get("Retry-After")
+    if value is None:
+        return 60 / API_RATE_LIMIT
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0, (parsedate_to_datetime(value) - dt_util.utcnow()).total_seconds()
+        )
+    except (TypeError, ValueError):
+        return 60 / API_RATE_LIMIT
@@ -1,9 +1,11 @@
 """Support for the NextDNS service."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from typing import Any
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
     SensorStateClass,
@@ -13,20 +15,39 @@ from homeassistant.const import PERCENTAGE
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from . import NextDnsUpdateCoordinator
+from . import (
+    NextDnsAnalyticsUpdateCoordinator,
+    NextDnsListsUpdateCoordinator,
+    NextDnsTopUpdateCoordinator,
+)
 from .const import (
+    ATTR_ALLOWLIST,
+    ATTR_ANALYTICS,
+    ATTR_DENYLIST,
     ATTR_DNSSEC,
     ATTR_ENCRYPTION,
     ATTR_IP_VERSIONS,
+    ATTR_LAST_SYNC,
+    ATTR_LISTS,
     ATTR_PROTOCOLS,
+    ATTR_RANKING,
     ATTR_STATUS,
+    ATTR_TOP,
+    ATTR_TOP_BLOCKED_DOMAINS,
+    ATTR_TOP_DOMAINS,
+    ATTR_TOP_REASONS,
+    CONF_IMPORT_STATISTICS,
     DOMAIN,
 )
+from .entity import NextDnsEntity
 
 PARALLEL_UPDATES = 1
 
+DOMAINS = "domains"
+QUERIES = "queries"
+
 
 @dataclass
 class NextDnsSensorRequiredKeysMixin:
@@ -49,7 +70,7 @@ SENSORS = (
         entity_category=EntityCategory.DIAGNOSTIC,
         icon="mdi:dns",
         name="{profile_name} DNS Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -58,7 +79,7 @@ SENSORS = (
         entity_category=EntityCategory.DIAGNOSTIC,
         icon="mdi:dns",
         name="{profile_name} DNS Queries Blocked",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -67,7 +88,7 @@ SENSORS = (
         entity_category=EntityCategory.DIAGNOSTIC,
         icon="mdi:dns",
         name="{profile_name} DNS Queries Relayed",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -86,7 +107,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:dns",
         name="{profile_name} DNS-over-HTTPS Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -96,7 +117,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:dns",
         name="{profile_name} DNS-over-TLS Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -106,7 +127,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:dns",
         name="{profile_name} DNS-over-QUIC Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -116,7 +137,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:dns",
         name="{profile_name} TCP Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -126,7 +147,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:dns",
         name="{profile_name} UDP Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -176,7 +197,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:lock",
         name="{profile_name} Encrypted Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -186,7 +207,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:lock-open",
         name="{profile_name} Unncrypted Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -206,7 +227,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:ip",
         name="{profile_name} IPv4 Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -216,7 +237,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:ip",
         name="{profile_name} IPv6 Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -236,7 +257,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:lock-check",
         name="{profile_name} DNSSEC Validated Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -246,7 +267,7 @@ SENSORS = (
         entity_registry_enabled_default=False,
         icon="mdi:lock-alert",
         name="{profile_name} DNSSEC Not Validated Queries",
-        native_unit_of_measurement="queries",
+        native_unit_of_measurement=QUERIES,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     NextDnsSensorEntityDescription(
@@ -262,45 +283,283 @@ SENSORS = (
 )
 
 
+@dataclass
+class NextDnsRateSensorRequiredKeysMixin:
+    """Class for NextDNS rate entity required keys."""
+
+    source_key: str
+    value_key: str
+
+
+@dataclass
+class NextDnsRateSensorEntityDescription(
+    NextDnsSensorEntityDescription, NextDnsRateSensorRequiredKeysMixin
+):
+    """NextDNS rate sensor entity description."""
+
+
+RATE_SENSORS = (
+    NextDnsRateSensorEntityDescription(
+        key="all_queries_rate",
+        coordinator_type=ATTR_STATUS,
+        source_key="all_queries",
+        value_key="rate",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:dns",
+        name="{profile_name} DNS Queries Rate",
+        native_unit_of_measurement="queries/min",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    NextDnsRateSensorEntityDescription(
+        key="blocked_queries_rate",
+        coordinator_type=ATTR_STATUS,
+        source_key="blocked_queries",
+        value_key="rate",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:dns",
+        name="{profile_name} DNS Queries Blocked Rate",
+        native_unit_of_measurement="queries/min",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    NextDnsRateSensorEntityDescription(
+        key="all_queries_delta",
+        coordinator_type=ATTR_STATUS,
+        source_key="all_queries",
+        value_key="delta",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:dns",
+        name="{profile_name} DNS Queries Since Last Update",
+        native_unit_of_measurement=QUERIES,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    NextDnsRateSensorEntityDescription(
+        key="blocked_queries_delta",
+        coordinator_type=ATTR_STATUS,
+        source_key="blocked_queries",
+        value_key="delta",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:dns",
+        name="{profile_name} DNS Queries Blocked Since Last Update",
+        native_unit_of_measurement=QUERIES,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+TOP_SENSORS = (
+    SensorEntityDescription(
+        key=ATTR_TOP_DOMAINS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:format-list-numbered",
+        name="{profile_name} Top Domain",
+    ),
+    SensorEntityDescription(
+        key=ATTR_TOP_BLOCKED_DOMAINS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:format-list-numbered",
+        name="{profile_name} Top Blocked Domain",
+    ),
+    SensorEntityDescription(
+        key=ATTR_TOP_REASONS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:format-list-numbered",
+        name="{profile_name} Top Block Reason",
+    ),
+)
+
+
+LIST_SENSORS = (
+    SensorEntityDescription(
+        key=ATTR_DENYLIST,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:playlist-remove",
+        name="{profile_name} Denylist Domains",
+        native_unit_of_measurement=DOMAINS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key=ATTR_ALLOWLIST,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:playlist-check",
+        name="{profile_name} Allowlist Domains",
+        native_unit_of_measurement=DOMAINS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key=ATTR_LAST_SYNC,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        name="{profile_name} Last List Sync",
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Add a NextDNS entities from a config_entry."""
-    sensors: list[NextDnsSensor] = []
-    coordinators = hass.data[DOMAIN][entry.entry_id]
+    coordinator: NextDnsAnalyticsUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        ATTR_ANALYTICS
+    ]
+    top_coordinator: NextDnsTopUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        ATTR_TOP
+    ]
+    lists_coordinator: NextDnsListsUpdateCoordinator = hass.data[DOMAIN][
+        entry.entry_id
+    ][ATTR_LISTS]
 
+    # Long-term statistics of the query counts are imported from the API time
+    # series, so the recorder does not compile them from the sensor states
+    import_statistics = entry.options.get(CONF_IMPORT_STATISTICS, False)
+
+    sensors: list[NextDnsSensor] = []
     for description in SENSORS:
-        sensors.append(
-            NextDnsSensor(coordinators[description.coordinator_type], description)
-        )
+        if import_statistics and description.native_unit_of_measurement == QUERIES:
+            description = replace(description, state_class=None)
+        sensors.append(NextDnsSensor(coordinator, description))
+
+    for description in RATE_SENSORS:
+        sensors.append(NextDnsRateSensor(coordinator, description))
+
+    top_sensors = [
+        NextDnsTopSensor(top_coordinator, description) for description in TOP_SENSORS
+    ]
 
-    async_add_entities(sensors)
+    list_sensors = [
+        NextDnsListSensor(lists_coordinator, description)
+        for description in LIST_SENSORS
+    ]
 
+    async_add_entities([*sensors, *top_sensors, *list_sensors])
 
-class NextDnsSensor(CoordinatorEntity, SensorEntity):
+
+class NextDnsSensor(NextDnsEntity, SensorEntity):
     """Define an NextDNS sensor."""
 
-    coordinator: NextDnsUpdateCoordinator
+    coordinator: NextDnsAnalyticsUpdateCoordinator
+    entity_description: NextDnsSensorEntityDescription
 
     def __init__(
         self,
-        coordinator: NextDnsUpdateCoordinator,
-        description: SensorEntityDescription,
+        coordinator: NextDnsAnalyticsUpdateCoordinator,
+        description: NextDnsSensorEntityDescription,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
-        self._attr_device_info = coordinator.device_info
-        self._attr_unique_id = f"{coordinator.profile_id}_{description.key}"
+        super().__init__(coordinator, description)
         self._attr_name = description.name.format(profile_name=coordinator.profile_name)
-        self._attr_native_value = getattr(coordinator.data, description.key)
-        self.entity_description = description
+
+    @property
+    def data_key(self) -> str:
+        """Return the key of the coordinator data used by the entity."""
+        return self.entity_description.coordinator_type
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = getattr(
-            self.coordinator.data, self.entity_description.key
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        analytics = getattr(
+            self.coordinator.data, self.entity_description.coordinator_type
         )
-        self.async_write_ha_state()
+        value = getattr(analytics, self.entity_description.key)
+        if value == self._attr_native_value:
+            return False
+
+        self._attr_native_value = value
+        return True
+
+
+class NextDnsRateSensor(NextDnsSensor):
+    """Define an NextDNS sensor with a rate derived from consecutive updates.
+
+    The values are net changes of the sliding window of NextDNS analytics, the
+    queries which left the window since the last update are subtracted.
+    """
+
+    entity_description: NextDnsRateSensorEntityDescription
+
+    @callback
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        counter = self.coordinator.rates.values[self.entity_description.source_key]
+        value = getattr(counter, self.entity_description.value_key)
+        if value == self._attr_native_value:
+            return False
+
+        self._attr_native_value = value
+        return True
+
+
+class NextDnsTopSensor(NextDnsEntity, SensorEntity):
+    """Define an NextDNS top list sensor.
+
+    The state is the first name of the ranking and the attributes hold only
+    the ranked names, so they are written when the order changes and not with
+    every change of the query counts.
+    """
+
+    coordinator: NextDnsTopUpdateCoordinator
+
+    def __init__(
+        self,
+        coordinator: NextDnsTopUpdateCoordinator,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        self._ranking: list[str] = []
+        super().__init__(coordinator, description)
+        self._attr_name = description.name.format(profile_name=coordinator.profile_name)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return {**(super().extra_state_attributes or {}), ATTR_RANKING: self._ranking}
+
+    @callback
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        ranking = self.coordinator.rankings[self.entity_description.key].names
+        if ranking == self._ranking:
+            return False
+
+        self._ranking = list(ranking)
+        self._attr_native_value = ranking[0] if ranking else None
+        return True
+
+
+class NextDnsListSensor(NextDnsEntity, SensorEntity):
+    """Define an NextDNS sensor of the denylist or the allowlist."""
+
+    coordinator: NextDnsListsUpdateCoordinator
+
+    def __init__(
+        self,
+        coordinator: NextDnsListsUpdateCoordinator,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator, description)
+        self._attr_name = description.name.format(profile_name=coordinator.profile_name)
+
+    @callback
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        value = getattr(self.coordinator.data, self.entity_description.key)
+        if self.entity_description.key == ATTR_LAST_SYNC:
+            value = dt_util.parse_datetime(value) if value else None
+        else:
+            value = len(value)
+        if value == self._attr_native_value:
+            return False
+
+        self._attr_native_value = value
+        return True
@@ -0,0 +1,266 @@
+"""Services of the NextDNS integration for many profiles at once."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from aiohttp import ClientError
+from nextdns import ApiError, InvalidApiKeyError
+from nextdns.const import MAP_SETTING
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID, CONF_API_KEY
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .breaker import async_call_with_retry
+from .const import (
+    ATTR_ANALYTICS,
+    ATTR_LISTS,
+    ATTR_SETTINGS,
+    CONF_ENTRY_IDS,
+    CONF_PROFILES,
+    DOMAIN,
+    EVENT_LIST_SYNCED,
+    EVENT_LOGS_CLEARED,
+    EVENT_SETTINGS_APPLIED,
+    SERVICE_APPLY_SETTINGS,
+    SERVICE_CLEAR_LOGS,
+    SERVICE_CONCURRENCY,
+    SERVICE_SYNC_LIST,
+)
+from .lists import LIST_TYPES, parse_domains, read_domains_file
+
+_LOGGER = logging.getLogger(__name__)
+
+TARGET_SCHEMA = {
+    vol.Optional(CONF_PROFILES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(CONF_ENTRY_IDS): vol.All(cv.ensure_list, [cv.string]),
+}
+
+APPLY_SETTINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SETTINGS): vol.All(
+            {vol.In(list(MAP_SETTING)): cv.boolean}, vol.Length(min=1)
+        ),
+        **TARGET_SCHEMA,
+    }
+)
+
+CLEAR_LOGS_SCHEMA = vol.Schema(TARGET_SCHEMA)
+
+SYNC_LIST_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("list_type"): vol.In(LIST_TYPES),
+            vol.Exclusive("domains", "source"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Exclusive("path", "source"): cv.string,
+            vol.Exclusive(ATTR_ENTITY_ID, "source"): cv.entity_id,
+            **TARGET_SCHEMA,
+        }
+    ),
+    cv.has_at_least_one_key("domains", "path", ATTR_ENTITY_ID),
+)
+
+
+@dataclass
+class ServiceTarget:
+    """Profile targeted by a service call."""
+
+    api_key: str
+    coordinators: dict[str, Any]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services."""
+
+    async def async_apply_settings(call: ServiceCall) -> None:
+        """Change the settings of the profiles and fire an event with the results."""
+        settings: dict[str, bool] = call.data[ATTR_SETTINGS]
+
+        async def apply(target: ServiceTarget) -> None:
+            """Apply the settings to one profile."""
+            if not await target.coordinators[ATTR_SETTINGS].async_set_settings(
+                settings
+            ):
+                raise ApiError("Settings not applied")
+
+        results = await async_run_for_profiles(
+            hass, async_get_targets(hass, call), apply
+        )
+        hass.bus.async_fire(
+            EVENT_SETTINGS_APPLIED, {"settings": settings, "results": results}
+        )
+
+    async def async_clear_logs(call: ServiceCall) -> None:
+        """Clear the logs of the profiles and fire an event with the results."""
+        start = hass.loop.time()
+
+        async def clear_logs(target: ServiceTarget) -> None:
+            """Clear the logs of one profile, transient errors are retried."""
+            await async_call_with_retry(
+                target.coordinators[ATTR_ANALYTICS].async_clear_logs
+            )
+
+        targets = async_get_targets(hass, call)
+        results = await async_run_for_profiles(hass, targets, clear_logs)
+        hass.bus.async_fire(
+            EVENT_LOGS_CLEARED,
+            {"results": results, "duration": round(hass.loop.time() - start, 3)},
+        )
+
+        # Only the analytics of the cleared profiles changed
+        coordinators = [
+            target.coordinators[ATTR_ANALYTICS]
+            for profile_id, target in targets.items()
+            if target is not None and results[profile_id]["success"]
+        ]
+        hass.async_create_task(_async_refresh_in_batches(coordinators))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_SETTINGS,
+        async_apply_settings,
+        schema=APPLY_SETTINGS_SCHEMA,
+    )
+
+    async def async_sync_list(call: ServiceCall) -> None:
+        """Sync the list of the profiles with the domains and fire an event."""
+        list_type: str = call.data["list_type"]
+        domains = await _async_get_domains(hass, call)
+
+        async def sync_list(target: ServiceTarget) -> dict[str, Any]:
+            """Sync the list of one profile."""
+            return await target.coordinators[ATTR_LISTS].async_sync_list(
+                list_type, domains
+            )
+
+        results = await async_run_for_profiles(
+            hass, async_get_targets(hass, call), sync_list
+        )
+        hass.bus.async_fire(
+            EVENT_LIST_SYNCED,
+            {"list_type": list_type, "domains": len(domains), "results": results},
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_CLEAR_LOGS, async_clear_logs, schema=CLEAR_LOGS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SYNC_LIST, async_sync_list, schema=SYNC_LIST_SCHEMA
+    )
+
+
+async def _async_get_domains(hass: HomeAssistant, call: ServiceCall) -> list[str]:
+    """Return the domains from the service data, a file or an entity."""
+    if (domains := call.data.get("domains")) is not None:
+        return list(domains)
+
+    if (path := call.data.get("path")) is not None:
+        if not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Path {path} is not allowed")
+        try:
+            return await hass.async_add_executor_job(read_domains_file, path)
+        except OSError as err:
+            raise HomeAssistantError(f"Cannot read {path}: {err}") from err
+
+    entity_id = call.data[ATTR_ENTITY_ID]
+    if (state := hass.states.get(entity_id)) is None:
+        raise HomeAssistantError(f"Entity {entity_id} not found")
+    # A list in the domains attribute or domains separated by commas in the state
+    if isinstance(attribute := state.attributes.get("domains"), list):
+        return [str(domain) for domain in attribute]
+    return parse_domains(state.state.replace(",", "\n"))
+
+
+async def _async_refresh_in_batches(coordinators: list[Any]) -> None:
+    """Refresh the coordinators in batches of SERVICE_CONCURRENCY."""
+    coordinators = [
+        coordinator for coordinator in coordinators if coordinator.enabled_keys
+    ]
+    for index in range(0, len(coordinators), SERVICE_CONCURRENCY):
+        batch = coordinators[index : index + SERVICE_CONCURRENCY]
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in batch))
+
+
+@callback
+def async_get_targets(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[str, ServiceTarget | None]:
+    """Return the targeted profiles, all if none are chosen.
+
+    Chosen profiles which are not set up are returned without a target.
+    """
+    entry_ids = call.data.get(CONF_ENTRY_IDS)
+    profiles = call.data.get(CONF_PROFILES)
+    domain_data = hass.data.get(DOMAIN, {})
+
+    targets: dict[str, ServiceTarget | None] = {
+        profile_id: None for profile_id in profiles or []
+    }
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if (coordinators := domain_data.get(entry.entry_id)) is None:
+            continue
+        profile_id = coordinators[ATTR_SETTINGS].profile_id
+        chosen = (entry_ids is None and profiles is None) or (
+            entry.entry_id in (entry_ids or []) or profile_id in (profiles or [])
+        )
+        if chosen:
+            targets[profile_id] = ServiceTarget(entry.data[CONF_API_KEY], coordinators)
+
+    return targets
+
+
+async def async_run_for_profiles(
+    hass: HomeAssistant,
+    targets: dict[str, ServiceTarget | None],
+    action: Callable[[ServiceTarget], Awaitable[dict[str, Any] | None]],
+) -> dict[str, dict[str, Any]]:
+    """Run the action for the profiles and return the result of each one.
+
+    The profiles of one API key are handled at most SERVICE_CONCURRENCY at once.
+    The dict returned by the action is added to the result.
+    """
+    semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def run(profile_id: str, target: ServiceTarget | None) -> dict[str, Any]:
+        """Run the action for one profile."""
+        if target is None:
+            return {"success": False, "error": "Profile not set up", "duration": 0.0}
+
+        semaphore = semaphores.setdefault(
+            target.api_key, asyncio.Semaphore(SERVICE_CONCURRENCY)
+        )
+        async with semaphore:
+            start = hass.loop.time()
+            details: dict[str, Any] | None = None
+            try:
+                details = await action(target)
+            except (
+                ApiError,
+                ClientError,
+                HomeAssistantError,
+                InvalidApiKeyError,
+                asyncio.TimeoutError,
+            ) as err:
+                _LOGGER.debug("Service call for %s failed: %s", profile_id, err)
+                error: str | None = str(err) or type(err).__name__
+            else:
+                error = None
+
+        return {
+            "success": error is None,
+            "error": error,
+            "duration": round(hass.loop.time() - start, 3),
+            **(details or {}),
+        }
+
+    results = await asyncio.gather(
+        *(run(profile_id, target) for profile_id, target in targets.items())
+    )
+    return dict(zip(targets, results))
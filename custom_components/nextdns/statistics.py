@@ -0,0 +1,217 @@
+"""Import NextDNS analytics time series into long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from http import HTTPStatus
+import logging
+from typing import Any
+
+from aiohttp.client_exceptions import ClientConnectorError
+from nextdns import ApiError, InvalidApiKeyError, NextDns
+from nextdns.const import (
+    API_ENDPOINT,
+    MAP_DNSSEC,
+    MAP_ENCRYPTED,
+    MAP_IP_VERSIONS,
+    MAP_PROTOCOLS,
+    MAP_STATUS,
+)
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_DNSSEC,
+    ATTR_ENCRYPTION,
+    ATTR_IP_VERSIONS,
+    ATTR_PROTOCOLS,
+    ATTR_STATUS,
+    DOMAIN,
+    PRIORITY_ANALYTICS,
+    STATISTICS_BACKFILL,
+    STATISTICS_BUCKET,
+)
+from .scheduler import request_priority
+from .sensor import QUERIES, SENSORS
+
+_LOGGER = logging.getLogger(__name__)
+
+ALL_QUERIES = "all_queries"
+
+# Analytics type: API type, field with the item name and map of items to keys
+SERIES: dict[str, tuple[str, str, dict[Any, str]]] = {
+    ATTR_DNSSEC: ("dnssec", "validated", MAP_DNSSEC),
+    ATTR_ENCRYPTION: ("encryption", "encrypted", MAP_ENCRYPTED),
+    ATTR_IP_VERSIONS: ("ipVersions", "version", MAP_IP_VERSIONS),
+    ATTR_PROTOCOLS: ("protocols", "protocol", MAP_PROTOCOLS),
+    ATTR_STATUS: ("status", "status", MAP_STATUS),
+}
+
+
+class NextDnsStatisticsImporter:
+    """Class to import hourly analytics buckets into long-term statistics.
+
+    Only complete buckets newer than the last imported one are added, so every
+    bucket is imported once and gaps after downtime are filled on the next run.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        nextdns: NextDns,
+        profile_id: str,
+        profile_name: str,
+        analytics_types: set[str],
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.nextdns = nextdns
+        self.profile_id = profile_id
+        self.profile_name = profile_name
+        self.analytics_types = analytics_types
+        self._last: dict[str, tuple[datetime | None, float]] = {}
+        self._lock = asyncio.Lock()
+
+    async def async_import(self, _now: datetime | None = None) -> None:
+        """Import the buckets completed since the last import."""
+        if self._lock.locked():
+            return
+
+        async with self._lock:
+            for analytics_type in sorted(self.analytics_types):
+                try:
+                    await self._async_import_series(analytics_type)
+                except (
+                    ApiError,
+                    ClientConnectorError,
+                    InvalidApiKeyError,
+                    asyncio.TimeoutError,
+                ) as err:
+                    _LOGGER.debug(
+                        "Importing %s statistics failed: %s", analytics_type, err
+                    )
+
+    async def _async_import_series(self, analytics_type: str) -> None:
+        """Import the time series of one analytics type."""
+        api_type, field_name, mapping = SERIES[analytics_type]
+        keys = list(mapping.values())
+        if analytics_type == ATTR_STATUS:
+            keys.append(ALL_QUERIES)
+
+        for key in keys:
+            if key not in self._last:
+                self._last[key] = await self._async_get_last_statistic(key)
+
+        now = dt_util.utcnow()
+        bucket = timedelta(seconds=STATISTICS_BUCKET)
+        last_starts = [self._last[key][0] for key in keys]
+        if None in last_starts:
+            since = now - STATISTICS_BACKFILL
+        else:
+            since = min(start for start in last_starts if start is not None) + bucket
+        if since + bucket > now:
+            return
+
+        times, items = await self._async_fetch_series(api_type, since)
+
+        series: dict[str, list[int]] = {}
+        for item in items:
+            if (key := mapping.get(item[field_name])) is not None:
+                series[key] = item["queries"]
+        if analytics_type == ATTR_STATUS and series:
+            series[ALL_QUERIES] = [sum(values) for values in zip(*series.values())]
+
+        for key, values in series.items():
+            self._async_add_statistics(key, times, values, now)
+
+    def _async_add_statistics(
+        self, key: str, times: list[datetime], values: list[int], now: datetime
+    ) -> None:
+        """Add the complete buckets not imported yet to the statistics."""
+        last_start, total = self._last[key]
+        bucket = timedelta(seconds=STATISTICS_BUCKET)
+
+        statistics: list[StatisticData] = []
+        for start, queries in zip(times, values):
+            # Statistics start at full hours and the current bucket is incomplete
+            if start.minute or start.second or start + bucket > now:
+                continue
+            if last_start is not None and start <= last_start:
+                continue
+            total += queries
+            statistics.append(StatisticData(start=start, state=queries, sum=total))
+
+        if not statistics:
+            return
+
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=self._statistic_name(key),
+            source=DOMAIN,
+            statistic_id=self._statistic_id(key),
+            unit_of_measurement=QUERIES,
+        )
+        async_add_external_statistics(self.hass, metadata, statistics)
+        self._last[key] = (statistics[-1]["start"], total)
+
+    async def _async_get_last_statistic(
+        self, key: str
+    ) -> tuple[datetime | None, float]:
+        """Return the start and sum of the last imported bucket."""
+        statistic_id = self._statistic_id(key)
+        result = await self.hass.async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True
+        )
+        if not (rows := result.get(statistic_id)):
+            return None, 0.0
+
+        start = rows[0]["start"]
+        if isinstance(start, str):
+            start = dt_util.parse_datetime(start)
+        return start, rows[0]["sum"] or 0.0
+
+    async def _async_fetch_series(
+        self, api_type: str, since: datetime
+    ) -> tuple[list[datetime], list[dict[str, Any]]]:
+        """Fetch the hourly time series of the analytics since the time."""
+        url = (
+            f"{API_ENDPOINT}/profiles/{self.profile_id}/analytics/{api_type};series"
+            f"?from={int(since.timestamp())}&interval={STATISTICS_BUCKET}"
+            "&alignment=clock"
+        )
+        # The library returns only the data of responses, bucket times are in meta
+        # pylint: disable=protected-access
+        with request_priority(PRIORITY_ANALYTICS):
+            resp = await self.nextdns._session.request(
+                "get", url, headers=self.nextdns._headers
+            )
+            if resp.status == HTTPStatus.FORBIDDEN.value:
+                raise InvalidApiKeyError
+            result = await resp.json()
+
+        if resp.status != HTTPStatus.OK.value:
+            raise ApiError(f"{resp.status}, {result['errors'][0]['code']}")
+
+        times = [
+            dt_util.as_utc(dt_util.parse_datetime(value))  # type: ignore[arg-type]
+            for value in result["meta"]["series"]["times"]
+        ]
+        return times, result["data"]
+
+    def _statistic_id(self, key: str) -> str:
+        """Return the statistic ID for the key."""
+        return f"{DOMAIN}:{self.profile_id.lower()}_{key}"
+
+    def _statistic_name(self, key: str) -> str:
+        """Return the statistic name, the same as the name of the sensor."""
+        for description in SENSORS:
+            if description.key == key and description.name is not None:
+                return description.name.format(profile_name=self.profile_name)
+        return f"{self.profile_name} {key}"
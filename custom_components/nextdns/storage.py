@@ -0,0 +1,52 @@
+"""Persist the last known NextDNS data of a config entry."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from nextdns import NextDns
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import ATTR_PROFILES, DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+if TYPE_CHECKING:
+    from . import NextDnsUpdateCoordinator
+
+
+class NextDnsStore:
+    """Class to store the last data fetched by the coordinators of an entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self.nextdns: NextDns | None = None
+        self.coordinators: dict[str, NextDnsUpdateCoordinator] = {}
+
+    async def async_load(self) -> dict[str, Any]:
+        """Load the stored data."""
+        data = await self._store.async_load()
+        return data if isinstance(data, dict) else {}
+
+    async def async_remove(self) -> None:
+        """Remove the stored data."""
+        await self._store.async_remove()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the data after a delay, saves scheduled meanwhile are merged."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        data: dict[str, Any] = {
+            key: asdict(coordinator.data)
+            for key, coordinator in self.coordinators.items()
+            if coordinator.data is not None
+        }
+        if self.nextdns is not None:
+            data[ATTR_PROFILES] = [asdict(profile) for profile in self.nextdns.profiles]
+
+        return data
@@ -8,12 +8,14 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import NextDnsSettingsUpdateCoordinator
 from .const import ATTR_SETTINGS, DOMAIN
+from .entity import NextDnsEntity
 
-PARALLEL_UPDATES = 1
+# Settings changes are coalesced and serialized by the settings writer of the
+# coordinator, so switches must not wait for each other.
+PARALLEL_UPDATES = 0
 
 SWITCHES = (
     SwitchEntityDescription(
@@ -160,44 +162,34 @@ async def async_setup_entry(
     async_add_entities(switches)
 
 
-class NextDnsSwitch(CoordinatorEntity[NextDnsSettingsUpdateCoordinator], SwitchEntity):
+class NextDnsSwitch(NextDnsEntity, SwitchEntity):
     """Define an NextDNS switch."""
 
+    coordinator: NextDnsSettingsUpdateCoordinator
+
     def __init__(
         self,
         coordinator: NextDnsSettingsUpdateCoordinator,
         description: SwitchEntityDescription,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
-        self._attr_device_info = coordinator.device_info
-        self._attr_unique_id = f"{coordinator.profile_id}_{description.key}"
+        super().__init__(coordinator, description)
         self._attr_name = description.name.format(profile_name=coordinator.profile_name)
-        self._attr_is_on = getattr(coordinator.data, description.key)
-        self.entity_description = description
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = getattr(self.coordinator.data, self.entity_description.key)
-        self.async_write_ha_state()
+    def _async_update_attrs(self) -> bool:
+        """Update the entity attributes, return True if they changed."""
+        is_on = getattr(self.coordinator.data, self.entity_description.key)
+        if is_on == self._attr_is_on:
+            return False
+
+        self._attr_is_on = is_on
+        return True
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on switch."""
-        result = await self.coordinator.nextdns.set_setting(
-            self.coordinator.profile_id, self.entity_description.key, True
-        )
-
-        if result:
-            self._attr_is_on = True
-            self.async_write_ha_state()
+        await self.coordinator.async_set_setting(self.entity_description.key, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off switch."""
-        result = await self.coordinator.nextdns.set_setting(
-            self.coordinator.profile_id, self.entity_description.key, False
-        )
-
-        if result:
-            self._attr_is_on = False
-            self.async_write_ha_state()
+        await self.coordinator.async_set_setting(self.entity_description.key, False)
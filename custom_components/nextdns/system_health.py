@@ -1,11 +1,17 @@
 """Provide info to system health."""
 from __future__ import annotations
 
+from typing import Any
+
 from nextdns.const import API_ENDPOINT
 
 from homeassistant.components import system_health
 from homeassistant.core import HomeAssistant, callback
 
+from .account import NextDnsAccount
+from .const import ATTR_ACCOUNTS, DOMAIN, LATENCY_BUCKETS
+from .metrics import EndpointMetrics
+
 
 @callback
 def async_register(  # pylint:disable=unused-argument
@@ -16,8 +22,38 @@ def async_register(  # pylint:disable=unused-argument
     register.async_register_info(system_health_info)
 
 
-async def system_health_info(hass: HomeAssistant) -> dict[str, str]:
+async def system_health_info(hass: HomeAssistant) -> dict[str, Any]:
     """Get info for the info page."""
-    return {
+    info: dict[str, Any] = {
         "can_reach_server": system_health.async_check_can_reach_url(hass, API_ENDPOINT)
     }
+
+    accounts: dict[str, NextDnsAccount] = hass.data.get(DOMAIN, {}).get(
+        ATTR_ACCOUNTS, {}
+    )
+    endpoints: dict[str, EndpointMetrics] = {}
+    for account in accounts.values():
+        for name, metrics in account.metrics.per_endpoint().items():
+            endpoints.setdefault(name, EndpointMetrics()).merge(metrics)
+    if not endpoints:
+        return info
+
+    total = EndpointMetrics()
+    for metrics in endpoints.values():
+        total.merge(metrics)
+    info["requests"] = total.requests
+    info["failed_requests"] = sum(total.errors.values())
+    info["timeouts"] = total.timeouts
+    if total.last_success is not None:
+        info["last_success"] = total.last_success.isoformat()
+
+    name, slowest = max(
+        endpoints.items(),
+        key=lambda item: item[1].latency_sum / max(item[1].requests, 1),
+    )
+    if (p99 := slowest.percentile(99)) is not None:
+        info["slowest_endpoint"] = f"{name} (p99 <= {p99} s)"
+    else:
+        info["slowest_endpoint"] = f"{name} (p99 > {LATENCY_BUCKETS[-1]} s)"
+
+    return info
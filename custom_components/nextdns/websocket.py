@@ -0,0 +1,230 @@
+"""WebSocket API with snapshots of the NextDNS data of all profiles."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    ATTR_ANALYTICS,
+    ATTR_CONNECTION,
+    ATTR_RATES,
+    ATTR_SETTINGS,
+    ATTR_TOP,
+    DOMAIN,
+    SIGNAL_UPDATED,
+    SNAPSHOT_UPDATE_DELAY,
+)
+
+SNAPSHOT_SCHEMA = {vol.Optional("profiles"): [str]}
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, websocket_snapshot)
+    websocket_api.async_register_command(hass, websocket_subscribe_snapshot)
+    websocket_api.async_register_command(hass, websocket_history)
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): "nextdns/snapshot", **SNAPSHOT_SCHEMA}
+)
+@callback
+def websocket_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the data of all or of the chosen profiles."""
+    connection.send_result(msg["id"], async_get_snapshot(hass, msg.get("profiles")))
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): "nextdns/snapshot/subscribe", **SNAPSHOT_SCHEMA}
+)
+@callback
+def websocket_subscribe_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Send the snapshot and then only the fields changed since the last message.
+
+    Updates of the coordinators are collected for SNAPSHOT_UPDATE_DELAY seconds
+    and sent in one message. Removed profiles and fields are sent as null.
+    """
+    profiles = msg.get("profiles")
+    last_snapshot = async_get_snapshot(hass, profiles)
+    unsub_send: CALLBACK_TYPE | None = None
+
+    @callback
+    def send_changes(_now: datetime) -> None:
+        """Send the changes since the last message."""
+        nonlocal last_snapshot, unsub_send
+        unsub_send = None
+        snapshot = async_get_snapshot(hass, profiles)
+        if changes := _diff(last_snapshot, snapshot):
+            last_snapshot = snapshot
+            connection.send_message(websocket_api.event_message(msg["id"], changes))
+
+    @callback
+    def schedule_send() -> None:
+        """Send the changes after the delay, updates meanwhile are merged."""
+        nonlocal unsub_send
+        if unsub_send is None:
+            unsub_send = async_call_later(hass, SNAPSHOT_UPDATE_DELAY, send_changes)
+
+    unsub_updates = async_dispatcher_connect(hass, SIGNAL_UPDATED, schedule_send)
+
+    @callback
+    def unsubscribe() -> None:
+        """Stop sending the changes."""
+        unsub_updates()
+        if unsub_send is not None:
+            unsub_send()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(websocket_api.event_message(msg["id"], last_snapshot))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "nextdns/history",
+        vol.Required("profile"): str,
+        vol.Optional("fields"): [str],
+        vol.Optional("since"): vol.Coerce(float),
+    }
+)
+@callback
+def websocket_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the analytics history of the profile, oldest samples first.
+
+    Samples are [timestamp, value] pairs, all fields are returned if no fields
+    are chosen.
+    """
+    if (coordinators := _async_get_coordinators(hass, msg["profile"])) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Profile not found"
+        )
+        return
+
+    history = coordinators[ATTR_ANALYTICS].history
+    fields = msg.get("fields") or sorted(history.fields)
+    connection.send_result(
+        msg["id"],
+        {
+            "latest": history.latest(),
+            "series": {
+                field: history.series(field, msg.get("since")) for field in fields
+            },
+        },
+    )
+
+
+@callback
+def async_get_snapshot(
+    hass: HomeAssistant, profiles: list[str] | None = None
+) -> dict[str, Any]:
+    """Return the data of the connection and of the profiles set up."""
+    domain_data = hass.data.get(DOMAIN, {})
+    snapshot: dict[str, Any] = {ATTR_CONNECTION: None, "profiles": {}}
+
+    if (connection := domain_data.get(ATTR_CONNECTION)) is not None:
+        snapshot[ATTR_CONNECTION] = _coordinator_data(connection)
+
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if (coordinators := domain_data.get(entry.entry_id)) is None:
+            continue
+        analytics = coordinators[ATTR_ANALYTICS]
+        if profiles is not None and analytics.profile_id not in profiles:
+            continue
+        snapshot["profiles"][analytics.profile_id] = _profile_snapshot(coordinators)
+
+    return snapshot
+
+
+@callback
+def _async_get_coordinators(
+    hass: HomeAssistant, profile_id: str
+) -> dict[str, Any] | None:
+    """Return the coordinators of the profile if it is set up."""
+    domain_data = hass.data.get(DOMAIN, {})
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        coordinators = domain_data.get(entry.entry_id)
+        if (
+            coordinators is not None
+            and coordinators[ATTR_ANALYTICS].profile_id == profile_id
+        ):
+            return coordinators
+    return None
+
+
+def _profile_snapshot(coordinators: dict[str, Any]) -> dict[str, Any]:
+    """Return the data of one profile."""
+    analytics = coordinators[ATTR_ANALYTICS]
+    top = coordinators[ATTR_TOP]
+
+    snapshot: dict[str, Any] = {
+        "name": analytics.profile_name,
+        "state": {
+            key: _coordinator_state(coordinators[key])
+            for key in (ATTR_ANALYTICS, ATTR_SETTINGS, ATTR_TOP)
+        },
+        ATTR_ANALYTICS: None,
+        ATTR_RATES: {key: asdict(rate) for key, rate in analytics.rates.values.items()},
+        ATTR_SETTINGS: _coordinator_data(coordinators[ATTR_SETTINGS]),
+        ATTR_TOP: {
+            key: list(ranking.names)
+            for key, ranking in top.rankings.items()
+            if key in top.enabled_keys
+        },
+    }
+    # The analytics types are flattened, their field names are unique
+    if analytics.data is not None:
+        snapshot[ATTR_ANALYTICS] = {
+            field: value
+            for analytics_type in sorted(analytics.enabled_keys)
+            for field, value in asdict(getattr(analytics.data, analytics_type)).items()
+        }
+
+    return snapshot
+
+
+def _coordinator_data(coordinator: Any) -> dict[str, Any] | None:
+    """Return the data of the coordinator as dict."""
+    return asdict(coordinator.data) if coordinator.data is not None else None
+
+
+def _coordinator_state(coordinator: Any) -> str:
+    """Return whether the data of the coordinator is current."""
+    if not coordinator.last_update_success:
+        return "unavailable"
+    return "stale" if coordinator.stale else "ok"
+
+
+def _diff(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """Return the values of the new dict which differ from the old one."""
+    changes: dict[str, Any] = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            if change := _diff(previous, value):
+                changes[key] = change
+        elif key not in old or value != previous:
+            changes[key] = value
+    for key in old.keys() - new.keys():
+        changes[key] = None
+    return changes
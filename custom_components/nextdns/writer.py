@@ -0,0 +1,99 @@
+"""Coalesce NextDNS settings writes."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+
+from nextdns import NextDns, SettingNotSupportedError
+from nextdns.const import ATTR_NAME, ATTR_URL, MAP_SETTING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .const import PRIORITY_WRITE, SETTINGS_WRITE_DELAY
+from .scheduler import request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SettingsWriter:
+    """Class to collect settings changes of a profile and write them in batches.
+
+    Changes requested within SETTINGS_WRITE_DELAY seconds are sent together,
+    with one PATCH request for each API endpoint they belong to.
+    """
+
+    def __init__(self, hass: HomeAssistant, nextdns: NextDns, profile_id: str) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.nextdns = nextdns
+        self.profile_id = profile_id
+        self._pending: dict[str, bool] = {}
+        self._waiters: dict[str, list[asyncio.Future[bool]]] = {}
+        self._lock = asyncio.Lock()
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    async def async_set_setting(self, setting: str, state: bool) -> bool:
+        """Queue a settings change and return the result of its write."""
+        if setting not in MAP_SETTING:
+            raise SettingNotSupportedError
+
+        future: asyncio.Future[bool] = self.hass.loop.create_future()
+        self._pending[setting] = state
+        self._waiters.setdefault(setting, []).append(future)
+
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, SETTINGS_WRITE_DELAY, self._async_flush
+            )
+
+        return await future
+
+    async def _async_flush(self, _now: datetime) -> None:
+        """Write all queued settings changes."""
+        self._unsub_flush = None
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, {}
+
+        requests: dict[str, dict[str, bool]] = {}
+        settings: dict[str, list[str]] = {}
+        for setting, state in pending.items():
+            url = MAP_SETTING[setting][ATTR_URL].format(profile_id=self.profile_id)
+            requests.setdefault(url, {})[MAP_SETTING[setting][ATTR_NAME]] = state
+            settings.setdefault(url, []).append(setting)
+
+        _LOGGER.debug(
+            "Writing %s settings of profile %s in %s requests",
+            len(pending),
+            self.profile_id,
+            len(requests),
+        )
+
+        # Batches are written one after another, so a later change of a setting
+        # never overtakes an earlier one.
+        async with self._lock:
+            with request_priority(PRIORITY_WRITE):
+                results = await asyncio.gather(
+                    *(self._async_patch(url, data) for url, data in requests.items()),
+                    return_exceptions=True,
+                )
+
+        for url, result in zip(requests, results):
+            for setting in settings[url]:
+                for future in waiters[setting]:
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    async def _async_patch(self, url: str, data: dict[str, bool]) -> bool:
+        """Send one PATCH request with several settings of the same endpoint."""
+        # The library only sends one setting per request, so the request is made
+        # with its HTTP method directly.
+        # pylint: disable=protected-access
+        resp = await self.nextdns._http_request("patch", url, data=data)
+
+        return resp.get("success", False) is True